@@ -28,3 +28,12 @@ __version_info__ = tuple(
     ]
 )
 __status__ = "5 - Production/Stable"
+
+try:
+    import django
+except ImportError:  # e.g. from setup.py
+    pass
+else:
+    if django.VERSION < (3, 2):
+        # Detected automatically since Django 3.2, which warns about it
+        default_app_config = "celery_growthmonitor.apps.CeleryGrowthMonitorConfig"
@@ -1,27 +1,81 @@
 from abc import ABCMeta
 
-from django.contrib import admin
-from django.urls import reverse
+from celery import group
+from django.contrib import admin, messages
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db import connections
+from django.http import Http404, JsonResponse
+from django.urls import path, reverse
+from django.utils.functional import cached_property
 from django.utils.html import format_html
 from django.utils.translation import ugettext_lazy as _
 
+from . import settings
+from .tasks import delete_jobs, get_operation, rerun_jobs, start_operation
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator avoiding exact counts of large tables.
+
+    On PostgreSQL, unfiltered tables are counted from the statistics of the planner. Otherwise, objects are counted
+    up to ``settings.ADMIN_COUNT_LIMIT``, further pages being unreachable.
+    """
+
+    limit = settings.ADMIN_COUNT_LIMIT
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, "query"):
+            return super().count
+        estimate = self._estimate(queryset)
+        if estimate is not None and estimate > self.limit:
+            return estimate
+        return queryset.order_by()[: self.limit].count()
+
+    @staticmethod
+    def _estimate(queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql" or queryset.query.where:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [connection.ops.quote_name(queryset.model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+        # Negative if the table has never been analyzed
+        return row[0] if row and row[0] >= 0 else None
+
 
 class AJobAdmin(admin.ModelAdmin):
     __metaclass__ = ABCMeta
 
     # Change list specifications
     list_display = (
-        "__str__",
+        "id",
         "identifier",
         "slug",
         "timestamp",
         "state",
         "status",
+        "completion",
         "duration",
         "closure",
     )
     list_filter = ("timestamp", "state", "status", "closure")
     search_fields = ("identifier", "slug")
+    date_hierarchy = "timestamp"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_only_fields = None
+    """
+    Fields loaded for the change list, defaults to the fields of ``list_display``. Set it if ``list_display`` shows
+    anything else than fields.
+    """
+    actions = ("delete_in_background", "rerun_in_background")
     # Instance specifications
     fields = (
         "timestamp",
@@ -29,15 +83,136 @@ class AJobAdmin(admin.ModelAdmin):
         "slug",
         "state",
         "status",
+        "completion",
+        "progress_message",
         "duration",
         "closure",
         "error",
+        "disk_usage",
+    )
+    readonly_fields = (
+        "timestamp",
+        "state",
+        "status",
+        "completion",
+        "progress_message",
+        "duration",
+        "error",
+        "disk_usage",
     )
-    readonly_fields = ("timestamp", "state", "status", "duration", "error")
 
     def has_add_permission(self, request):
         return False
 
+    def get_list_only_fields(self, request):
+        """
+        Returns
+        -------
+        iterable of str or None
+            Fields loaded for the change list, None to load all fields
+
+        """
+        if self.list_only_fields is not None:
+            return self.list_only_fields
+        fields = []
+        for name in self.get_list_display(request):
+            try:
+                fields.append(self.model._meta.get_field(name).name)
+            except FieldDoesNotExist:
+                # Cannot guess what is needed
+                return None
+        return fields
+
+    def get_paginator(self, request, queryset, *args, **kwargs):
+        fields = self.get_list_only_fields(request)
+        if fields is not None:
+            queryset = queryset.only(*fields)
+        return super().get_paginator(request, queryset, *args, **kwargs)
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # Would delete the jobs and their files within the request
+        actions.pop("delete_selected", None)
+        if not self.model.can_rerun():
+            actions.pop("rerun_in_background", None)
+        return actions
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path(
+                "operations/<str:operation>/",
+                self.admin_site.admin_view(self.operation_view),
+                name="{}_{}_operation".format(*info),
+            ),
+        ] + super().get_urls()
+
+    def operation_view(self, request, operation):
+        """
+        Progress of a background action, as JSON.
+        """
+        progress = get_operation(operation)
+        if progress is None:
+            raise Http404(_("Unknown operation"))
+        return JsonResponse(progress)
+
+    def run_in_background(self, request, queryset, task, description):
+        """
+        Process the selected jobs with `task`, in chunks of ``settings.ADMIN_ACTION_CHUNK_SIZE`` primary keys.
+
+        Parameters
+        ----------
+        request
+        queryset
+        task : celery.Task
+            Receiving the label of the job model, the primary keys of a chunk and the identifier of the operation
+        description : str
+
+        Returns
+        -------
+        str
+            Identifier of the operation, see `operation_view`
+
+        """
+        pks = list(queryset.order_by("pk").values_list("pk", flat=True))
+        size = settings.ADMIN_ACTION_CHUNK_SIZE
+        operation = start_operation(len(pks))
+        group(
+            task.si(self.model._meta.label, pks[i : i + size], operation)
+            for i in range(0, len(pks), size)
+        ).apply_async()
+        url = reverse(
+            "{}:{}_{}_operation".format(
+                self.admin_site.name,
+                self.model._meta.app_label,
+                self.model._meta.model_name,
+            ),
+            args=(operation,),
+        )
+        self.message_user(
+            request,
+            format_html(
+                _('{} of {} jobs started, see its <a href="{}">progress</a>'),
+                description,
+                len(pks),
+                url,
+            ),
+            messages.INFO,
+        )
+        return operation
+
+    def delete_in_background(self, request, queryset):
+        return self.run_in_background(request, queryset, delete_jobs, _("Deletion"))
+
+    delete_in_background.allowed_permissions = ("delete",)
+    delete_in_background.short_description = _("Delete selected jobs in background")
+
+    def rerun_in_background(self, request, queryset):
+        return self.run_in_background(request, queryset, rerun_jobs, _("Re-run"))
+
+    rerun_in_background.allowed_permissions = ("change",)
+    rerun_in_background.short_description = _("Run selected jobs again in background")
+
 
 class AFieldsForDataFileInlineModelAdmin(admin.options.InlineModelAdmin):
     __metaclass__ = ABCMeta
@@ -51,28 +226,57 @@ class AFieldsForDataFileInlineModelAdmin(admin.options.InlineModelAdmin):
 
 
 class HasJobAdminMixin:
+    """
+    Show the job of the objects referring to a job through their ``job`` field, e.g. data files.
+
+    The job is loaded along with the objects of the change list, searched by slug or identifier, and selected with an
+    autocomplete widget if its model admin is registered with search fields. Searches are case-sensitive, with the
+    ``exact`` and ``startswith`` lookups, so that they use the indexes of the jobs: the case-insensitive lookups of the
+    ``=`` and ``^`` prefixes compare ``UPPER()`` values on PostgreSQL, which plain indexes do not cover.
+    """
+
     app_label = None
+    """Defaults to the app label of `job_model`"""
     job_model = None
+    """Defaults to the model referred to by the ``job`` field"""
     job_label = _("Job")
 
     list_display = ("render_job",)
     list_filter = ()
-    search_fields = ("render_job",)
+    list_select_related = ("job",)
+    search_fields = ("job__slug__exact", "job__identifier__startswith")
     fields = ("job_link",)
     readonly_fields = ("job_link",)
 
+    def get_job_model(self):
+        return self.job_model or self.model._meta.get_field("job").related_model
+
+    def get_autocomplete_fields(self, request):
+        autocomplete_fields = tuple(super().get_autocomplete_fields(request))
+        job_admin = self.admin_site._registry.get(self.get_job_model())
+        if job_admin is not None and job_admin.get_search_fields(request):
+            autocomplete_fields += ("job",)
+        return autocomplete_fields
+
     def render_job(self, obj):
         return str(obj.job)
 
     render_job.short_description = job_label
 
     def job_link(self, obj):
+        job_model = self.get_job_model()
         url = reverse(
             "admin:{}_{}_change".format(
-                self.app_label, self.job_model.__name__.lower()
+                self.app_label or job_model._meta.app_label,
+                job_model._meta.model_name,
             ),
-            args=(obj.job.pk,),
+            args=(obj.job_id,),
         )
-        return format_html('<a href="%s">%s</a>' % (url, self.render_job(obj)))
+        if self.model._meta.get_field("job").is_cached(obj):
+            text = self.render_job(obj)
+        else:
+            # Not worth a query
+            text = "{} {}".format(job_model.__name__, obj.job_id)
+        return format_html('<a href="{}">{}</a>', url, text)
 
     job_link.short_description = job_label
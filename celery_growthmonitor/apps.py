@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CeleryGrowthMonitorConfig(AppConfig):
     name = "celery_growthmonitor"
     verbose_name = "Celery Growth Monitor"
+
+    def ready(self):
+        # Connect signal receivers
+        from . import metrics  # noqa: F401
+        from .serialization import register_serializers
+
+        register_serializers()
@@ -1,10 +1,17 @@
 from __future__ import absolute_import, unicode_literals
 
 from celery.canvas import chain as celery_chain
+from celery.canvas import group as celery_group
 
 from celery_growthmonitor import settings
 from celery_growthmonitor.models import JobHolder
-from celery_growthmonitor.tasks import remove_old_jobs, start, stop
+from celery_growthmonitor.tasks import (
+    LIFECYCLE_HEADER,
+    merge,
+    remove_old_jobs,
+    start,
+    stop,
+)
 
 
 def pre(job_holder: JobHolder, *tasks):
@@ -19,11 +26,33 @@ def post(*tasks):
     if tasks:
         flow += tasks
     flow += (stop.s(),)
-    if settings.TTL.seconds > 0:
+    if settings.PURGE_IN_CHAIN and settings.TTL.seconds > 0:
         flow += (remove_old_jobs.s(),)
     return flow
 
 
+def parallel(*tasks):
+    """
+    Run tasks in parallel, each one receiving the results of the previous task, and merge their results.
+
+    The merged results are passed to the next task, as a tuple with the results of each task, in order. The next task
+    is run once all parallel tasks are done.
+
+    Parameters
+    ----------
+    tasks : celery.shared_task
+
+    Returns
+    -------
+    tuple
+        To be inserted among the tasks of `chain`
+
+    """
+    if not tasks:
+        raise ValueError("At least one task is required")
+    return celery_group(*tasks), merge.s()
+
+
 def chain(job_holder: JobHolder, *tasks):
     """
     Build a chain of tasks, adding monitoring and maintenance tasks at the beginning and end of the chain
@@ -51,3 +80,56 @@ def chain_pre(job_holder: JobHolder, *tasks):
 def chain_post(*tasks):
     flow = post(*tasks)
     return celery_chain(*flow)
+
+
+def chain_parallel(job_holder: JobHolder, *tasks):
+    """
+    Build a chain running tasks in parallel, between the monitoring and maintenance tasks
+
+    The job is completed once all tasks are done.
+
+    Parameters
+    ----------
+    job_holder : JobHolder
+    tasks : celery.shared_task
+
+    Returns
+    -------
+    celery.canvas.chain
+
+    """
+    return chain(job_holder, *parallel(*tasks))
+
+
+def _mark(signature, *lifecycle):
+    headers = dict(signature.options.get("headers") or {})
+    headers[LIFECYCLE_HEADER] = lifecycle
+    signature.set(headers=headers)
+    return signature
+
+
+def chain_inline(job_holder: JobHolder, *tasks):
+    """
+    Build a chain of tasks monitoring the job themselves, saving the monitoring and maintenance tasks.
+
+    The first task starts the job before running, the last one stops it once done. Tasks must be based on
+    `tasks.MonitoredTask`, see `tasks.monitored_task`.
+
+    Parameters
+    ----------
+    job_holder : JobHolder
+    tasks : celery.shared_task
+
+    Returns
+    -------
+    celery.canvas.chain
+
+    """
+    if not tasks:
+        raise ValueError("At least one task is required")
+    first, *others = tasks
+    first = first.clone(args=(job_holder,))
+    if not others:
+        return celery_chain(_mark(first, "start", "stop"))
+    *others, last = others
+    return celery_chain(_mark(first, "start"), *others, _mark(last.clone(), "stop"))
@@ -0,0 +1,155 @@
+"""
+Metrics about the jobs, in the Prometheus text exposition format.
+"""
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.cache import caches
+from django.db.models import Count, Q, Sum
+from django.dispatch import receiver
+
+from . import settings
+from .models.job import AJob
+from .models.signals import jobs_purged
+
+PREFIX = "celery_growthmonitor"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+_CACHE_KEY = "{}:metrics".format(__name__)
+
+
+def _purge_key(model, unit):
+    return "{}:purged:{}:{}".format(__name__, model._meta.label_lower, unit)
+
+
+@receiver(jobs_purged)
+def _count_purge(sender, report, **kwargs):
+    cache = caches[settings.CACHE]
+    for unit, value in (("rows", report.rows), ("bytes", report.bytes)):
+        key = _purge_key(sender, unit)
+        if not cache.add(key, value, None):
+            try:
+                cache.incr(key, value)
+            except ValueError:
+                # Evicted in the meantime
+                cache.set(key, value, None)
+
+
+def _sample(name, labels, value):
+    return "{}_{}{{{}}} {}".format(
+        PREFIX,
+        name,
+        ",".join('{}="{}"'.format(key, value) for key, value in labels),
+        value,
+    )
+
+
+def _header(name, kind, description):
+    return [
+        "# HELP {}_{} {}".format(PREFIX, name, description),
+        "# TYPE {}_{} {}".format(PREFIX, name, kind),
+    ]
+
+
+def render_metrics():
+    """
+    Compute the metrics, with a few grouped queries per job class.
+
+    Returns
+    -------
+    str
+
+    """
+    cache = caches[settings.CACHE]
+    models = [model for model in apps.get_models() if issubclass(model, AJob)]
+    buckets = sorted(settings.METRICS_DURATION_BUCKETS)
+    jobs = _header("jobs", "gauge", "Number of jobs per state and status.")
+    durations = _header(
+        "job_duration_seconds", "histogram", "Duration of the jobs once completed."
+    )
+    purged_rows = _header("purged_jobs_total", "counter", "Number of purged jobs.")
+    purged_bytes = _header(
+        "purged_bytes_total", "counter", "Number of bytes freed by purges."
+    )
+    for model in models:
+        label = ("model", model._meta.label_lower)
+        counts = (
+            model.objects.order_by()
+            .values_list("state", "status")
+            .annotate(count=Count("pk"))
+        )
+        for state, status, count in counts:
+            jobs.append(
+                _sample(
+                    "jobs",
+                    (label, ("state", state.name), ("status", status.name)),
+                    count,
+                )
+            )
+        aggregates = model.objects.filter(duration__isnull=False).aggregate(
+            count=Count("pk"),
+            sum=Sum("duration"),
+            **{
+                "le_{}".format(i): Count(
+                    "pk", filter=Q(duration__lte=timedelta(seconds=bound))
+                )
+                for i, bound in enumerate(buckets)
+            }
+        )
+        for i, bound in enumerate(buckets):
+            durations.append(
+                _sample(
+                    "job_duration_seconds_bucket",
+                    (label, ("le", bound)),
+                    aggregates["le_{}".format(i)],
+                )
+            )
+        durations.append(
+            _sample(
+                "job_duration_seconds_bucket",
+                (label, ("le", "+Inf")),
+                aggregates["count"],
+            )
+        )
+        durations.append(
+            _sample(
+                "job_duration_seconds_sum",
+                (label,),
+                (aggregates["sum"] or timedelta(0)).total_seconds(),
+            )
+        )
+        durations.append(
+            _sample("job_duration_seconds_count", (label,), aggregates["count"])
+        )
+        purged_rows.append(
+            _sample(
+                "purged_jobs_total",
+                (label,),
+                cache.get(_purge_key(model, "rows"), 0),
+            )
+        )
+        purged_bytes.append(
+            _sample(
+                "purged_bytes_total",
+                (label,),
+                cache.get(_purge_key(model, "bytes"), 0),
+            )
+        )
+    return "\n".join(jobs + durations + purged_rows + purged_bytes) + "\n"
+
+
+def collect_metrics():
+    """
+    Metrics about the jobs, cached for ``settings.METRICS_CACHE_TIMEOUT`` seconds.
+
+    Returns
+    -------
+    str
+        Metrics in the Prometheus text exposition format
+
+    """
+    cache = caches[settings.CACHE]
+    metrics = cache.get(_CACHE_KEY)
+    if metrics is None:
+        metrics = render_metrics()
+        cache.set(_CACHE_KEY, metrics, settings.METRICS_CACHE_TIMEOUT)
+    return metrics
@@ -1,6 +1,15 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from .job import AJob, ADataFile
+from .job import (
+    AJob,
+    ADataFile,
+    DiskQuotaExceeded,
+    PurgeReport,
+    deferred_file_removal,
+    job_updated,
+    jobs_purged,
+)
 from .job import job_root, job_data, job_results, get_upload_to_path, get_absolute_path
 from .jobholder import JobHolder
+from .taskrun import ATaskRun
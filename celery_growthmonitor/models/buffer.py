@@ -0,0 +1,150 @@
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from celery import signals as celery_signals
+from django.db import connections
+
+from .. import settings
+from .signals import job_updated
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    Coalesce frequent updates of jobs in memory, keeping only the latest value of each field, and write them in bulk.
+
+    Pending updates are written once `interval` seconds have elapsed since the last flush, or once `size` jobs have
+    pending updates, whichever comes first. Without further updates, they are written by a timer, so that they are not
+    kept in memory longer than `interval` seconds, e.g. outside Celery tasks. They are also written at exit.
+
+    Parameters
+    ----------
+    interval : float
+        Maximum age of the pending updates, in seconds
+    size : int
+        Maximum number of jobs with pending updates
+    """
+
+    def __init__(self, interval, size):
+        self.interval = interval
+        self.size = size
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._timer = None
+
+    def add(self, job, update_fields):
+        """
+        Buffer the current values of `update_fields` of `job`.
+
+        Parameters
+        ----------
+        job : AJob
+            Saved job
+        update_fields : iterable of str
+
+        """
+        values = {name: getattr(job, name) for name in update_fields}
+        with self._lock:
+            self._pending.setdefault((job.__class__, job.pk), {}).update(values)
+            due = (
+                len(self._pending) >= self.size
+                or time.monotonic() - self._last_flush >= self.interval
+            )
+            if not due and self._timer is None:
+                self._timer = threading.Timer(self.interval, self._flush_on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def pop(self, job):
+        """
+        Remove the pending updates of `job`, e.g. to write them along with another update.
+
+        Parameters
+        ----------
+        job : AJob
+
+        Returns
+        -------
+        dict
+            Latest value of each pending field
+
+        """
+        with self._lock:
+            values = self._pending.pop((job.__class__, job.pk), {})
+            if not self._pending:
+                self._cancel_timer()
+            return values
+
+    def flush(self):
+        """
+        Write all pending updates, with one query per job class and set of fields.
+
+        Updates of ``PROGRESS_FIELDS`` are not written to completed jobs, so that they do not override the completion
+        if it was written concurrently, e.g. by the task stopping the job while a timer flushes.
+
+        Returns
+        -------
+        int
+            Number of updated jobs
+
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+            self._cancel_timer()
+        groups = defaultdict(list)
+        for (model, pk), values in pending.items():
+            progress = {
+                name: values.pop(name)
+                for name in model.PROGRESS_FIELDS
+                if name in values
+            }
+            for is_progress, values in ((False, values), (True, progress)):
+                if values:
+                    job = model(pk=pk, **values)
+                    job._bump_version()
+                    groups[(model, tuple(sorted(values)), is_progress)].append(job)
+        for (model, fields, is_progress), jobs in groups.items():
+            queryset = model.objects.all()
+            if is_progress:
+                # The completion may have been written since the updates were taken, bulk_update() keeps the filter
+                queryset = queryset.exclude(state=model.EState.COMPLETED)
+            queryset.bulk_update(jobs, (*fields, "version"))
+            for job in jobs:
+                job._forget_version()
+                job_updated.send(sender=model, instance=job, fields=fields)
+        return len(pending)
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Could not write buffered job updates")
+        finally:
+            # Connections are opened per thread
+            connections.close_all()
+
+
+write_behind = WriteBehindBuffer(settings.BUFFER_INTERVAL, settings.BUFFER_SIZE)
+
+
+@atexit.register
+@celery_signals.task_postrun.connect
+@celery_signals.worker_process_shutdown.connect
+def _flush_write_behind(*args, **kwargs):
+    try:
+        write_behind.flush()
+    except Exception:
+        logger.exception("Could not write buffered job updates")
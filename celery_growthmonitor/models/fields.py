@@ -0,0 +1,141 @@
+import os
+import random as rnd
+import threading
+import time
+import uuid
+
+from autoslug import AutoSlugField
+from autoslug import utils
+from django.core.cache import caches
+
+BASE36_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def base36(number, length):
+    """
+    Parameters
+    ----------
+    number : int
+        Non-negative integer lower than 36 ** `length`
+    length : int
+
+    Returns
+    -------
+    str
+        Base 36 representation of `number`, left-padded with zeros to `length` digits
+
+    """
+    digits = []
+    for _ in range(length):
+        number, digit = divmod(number, 36)
+        digits.append(BASE36_DIGITS[digit])
+    return "".join(reversed(digits))
+
+
+class SlugSequence:
+    """
+    Generate time-ordered tokens.
+
+    A token is made of the minute in UTC (``YYMMDDHHmm``), the microseconds within that minute and a node identifying
+    the process. Within a process, the underlying timestamp is strictly increasing, so that tokens never repeat.
+    Processes are told apart by their node, drawn at random and leased in the cache ``settings.CACHE`` for
+    ``settings.SLUG_NODE_LEASE`` seconds, so that concurrent processes never share a node. Tokens are thus unique as
+    long as that cache is shared by all the processes creating jobs.
+    """
+
+    NODE_LENGTH = 4
+    NODE_ATTEMPTS = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last = 0
+        self.reset_node()
+
+    def reset_node(self):
+        self.node = None
+        self._lease_token = None
+        self._lease_expiry = 0
+
+    @staticmethod
+    def _node_key(node):
+        return "{}:slug-node:{}".format(__name__, node)
+
+    def _lease_node(self, now):
+        """
+        Lease a node, or renew the current lease once half of it is over.
+
+        Parameters
+        ----------
+        now : float
+            In seconds
+
+        """
+        from .. import settings
+
+        timeout = settings.SLUG_NODE_LEASE
+        if now < self._lease_expiry - timeout / 2:
+            return
+        cache = caches[settings.CACHE]
+        if (
+            self.node is not None
+            and now < self._lease_expiry
+            and cache.get(self._node_key(self.node)) == self._lease_token
+        ):
+            cache.touch(self._node_key(self.node), timeout)
+            self._lease_expiry = now + timeout
+            return
+        token = uuid.uuid4().hex
+        for _ in range(self.NODE_ATTEMPTS):
+            node = base36(rnd.randrange(36 ** self.NODE_LENGTH), self.NODE_LENGTH)
+            if cache.add(self._node_key(node), token, timeout):
+                self.node, self._lease_token = node, token
+                self._lease_expiry = now + timeout
+                return
+        raise RuntimeError("Could not lease a node to generate slugs")
+
+    def next(self):
+        """
+        Returns
+        -------
+        str
+            Token of the form ``YYMMDDHHmm-uuuuunnnn``
+
+        """
+        with self._lock:
+            now = time.time()
+            self._lease_node(now)
+            self._last = max(int(now * 10 ** 6), self._last + 1)
+            timestamp, node = self._last, self.node
+        seconds, micros = divmod(timestamp, 10 ** 6)
+        # Not derived from tm_sec, which may be 60 on a leap second
+        seconds, second = divmod(seconds, 60)
+        return "{}-{}{}".format(
+            time.strftime("%y%m%d%H%M", time.gmtime(seconds * 60)),
+            base36((second * 10 ** 6) + micros, 5),
+            node,
+        )
+
+
+slug_sequence = SlugSequence()
+if hasattr(os, "register_at_fork"):
+    # Forked workers must not share the node of their parent
+    os.register_at_fork(after_in_child=slug_sequence.reset_node)
+
+
+class SequentialSlugField(AutoSlugField):
+    """
+    AutoSlugField trusting the uniqueness of the slugs it generates, e.g. using `slug_sequence`.
+
+    Generated slugs are not checked against the database, which saves a query per creation. Slugs given explicitly are
+    still made unique as AutoSlugField does.
+    """
+
+    def pre_save(self, instance, add):
+        if self.always_update or not self.populate_from:
+            return super(SequentialSlugField, self).pre_save(instance, add)
+        if self.value_from_object(instance):
+            return super(SequentialSlugField, self).pre_save(instance, add)
+        slug = self.slugify(utils.get_prepopulated_value(self, instance))
+        slug = utils.crop_slug(self, slug)
+        setattr(instance, self.name, slug)
+        return slug
@@ -4,22 +4,89 @@ import logging
 import os
 import random as rnd
 import re
+import shutil
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
 from datetime import datetime
 from distutils.version import StrictVersion
 from enum import unique
 
 from django import get_version as django_version
 from django.core.validators import RegexValidator
-from django.db import models
+from django.db import connections, models, router
 from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
 from .. import settings
+from .buffer import write_behind
+from .fields import SequentialSlugField, slug_sequence
+from .signals import job_updated, jobs_purged
+from .statecache import state_cache
 
 logger = logging.getLogger(__name__)
 TEMPORARY_JOB_FOLDER = "tmp"
 
+PurgeReport = namedtuple("PurgeReport", ["rows", "bytes"])
+
+_deferred = threading.local()
+
+
+class DiskQuotaExceeded(Exception):
+    """
+    Raised when storing files would exceed a disk quota, see `AJob.check_disk_quota`.
+
+    Parameters
+    ----------
+    quota : int
+        Exceeded quota, in bytes
+    usage : int
+        Bytes already stored
+    requested : int
+        Bytes to be stored
+    identifier : str
+        Identifier of the jobs, if the quota is per identifier
+
+    """
+
+    def __init__(self, quota, usage, requested, identifier=None):
+        self.quota = quota
+        self.usage = usage
+        self.requested = requested
+        self.identifier = identifier
+        super().__init__(
+            "Storing {} bytes would exceed the quota of {} bytes{}, {} bytes are already used".format(
+                requested,
+                quota,
+                " for {!r}".format(identifier) if identifier is not None else "",
+                usage,
+            )
+        )
+
+
+def _next_version():
+    return models.F("version") + 1
+
+
+def _sync_to_async(func):
+    # asgiref is only installed along with Django >= 3.0, the synchronous API does not depend on it
+    from asgiref.sync import sync_to_async
+
+    return sync_to_async(func)
+
+
+async def _acall(obj, method, *args, **kwargs):
+    """
+    Call the asynchronous counterpart of `method` provided by Django >= 4.1, e.g. ``aupdate`` for ``update``, or
+    `method` in a thread otherwise.
+    """
+    amethod = getattr(obj, "a{}".format(method), None)
+    if amethod is not None:
+        return await amethod(*args, **kwargs)
+    return await _sync_to_async(getattr(obj, method))(*args, **kwargs)
+
 
 def job_root(instance, filename=""):
     """
@@ -146,6 +213,48 @@ def get_absolute_path(instance, callable_or_prefix, filename=""):
     )
 
 
+def _move_file(file, name):
+    """
+    Move `file` within its storage.
+
+    On the local filesystem, the file is renamed, which is atomic and does not depend on its size. The file is copied
+    otherwise, e.g. across filesystems or for remote storages.
+
+    Parameters
+    ----------
+    file : django.db.models.fields.files.FieldFile
+    name : str
+        Requested new name
+
+    Returns
+    -------
+    str
+        Actual new name
+
+    """
+    storage = file.storage
+    old_name = file.name
+    name = storage.get_available_name(name, max_length=file.field.max_length)
+    file.close()
+    try:
+        old_path, new_path = storage.path(old_name), storage.path(name)
+    except NotImplementedError:
+        # Not stored on the local filesystem
+        pass
+    else:
+        try:
+            os.makedirs(os.path.dirname(new_path), exist_ok=True)
+            os.rename(old_path, new_path)
+            return name
+        except OSError:
+            logger.debug("Could not rename %s, copying it instead", old_path)
+    # Create new file and remove old one
+    name = storage.save(name, file)
+    file.close()
+    storage.delete(old_name)
+    return name
+
+
 class AJob(models.Model):
     """
 
@@ -154,16 +263,25 @@ class AJob(models.Model):
     Set `upload_to_results` to define a custom path to the results sub-folder of the job (str or callable).
     Set ``REQUIRED_USER_FILES_ATTRNAME`` to define mandatory files uploaded with this job (or use ADataFile if multiple)
 
+    Concrete subclasses declaring their own ``Meta`` should inherit from ``AJob.Meta`` to keep its indexes.
+
     --------
     http://stackoverflow.com/questions/16655097/django-abstract-models-versus-regular-inheritance#16838663
     """
 
-    from autoslug import AutoSlugField
     from echoices.enums import EChoice
     from echoices.fields import make_echoicefield
 
     class Meta:
         abstract = True
+        indexes = [
+            # Counting and filtering jobs, e.g. admin filters and dashboards
+            models.Index(fields=["state", "status"]),
+            # Purge of expired jobs per status
+            models.Index(fields=["status", "closure"]),
+            # Running jobs, by start time
+            models.Index(fields=["state", "started"]),
+        ]
 
     @unique
     class EState(EChoice):
@@ -191,6 +309,20 @@ class AJob(models.Model):
     SLUG_MAX_LENGTH = 32
     SLUG_RND_LENGTH = 6
 
+    ALLOWED_TRANSITIONS = {
+        EState.SUBMITTED: (EState.CREATED,),
+        EState.RUNNING: (EState.CREATED, EState.SUBMITTED),
+        EState.COMPLETED: (EState.CREATED, EState.SUBMITTED, EState.RUNNING),
+    }
+    """
+    States from which each state can be reached, see `transition`.
+    """
+    LIFECYCLE_FIELDS = ("state", "status", "started", "duration", "error", "version")
+    PROGRESS_FIELDS = ("completion", "progress_message")
+    """
+    Fields written by the completion of the job, buffered updates of which are dropped once the job is completed.
+    """
+
     REQUIRED_USER_FILES_ATTRNAME = "required_user_files"
 
     root_job = None
@@ -202,18 +334,11 @@ class AJob(models.Model):
             slug = self.identifier[: min(len(self.identifier), self.SLUG_RND_LENGTH)]
         else:
             slug = self.__class__.__name__[0]
-        slug += self.timestamp.strftime("%y%m%d%H%M")  # YYMMDDHHmm
-        if len(slug) > self.SLUG_MAX_LENGTH:
-            slug = slug[: self.SLUG_MAX_LENGTH - self.SLUG_RND_LENGTH] + str(
-                rnd.randrange(
-                    10 ** (self.SLUG_RND_LENGTH - 1), 10 ** self.SLUG_RND_LENGTH
-                )
-            )
-        # TODO: assert uniqueness, otherwise regen
-        return slug
+        # YYMMDDHHmm-xxxxxxxxx, unique by construction
+        return slug + slug_sequence.next()
 
     timestamp = models.DateTimeField(
-        verbose_name=_("job creation timestamp"), auto_now_add=True
+        verbose_name=_("job creation timestamp"), auto_now_add=True, db_index=True
     )
     # TODO: validate identifier over allowance for slug or [a-zA-Z0-9_]
     identifier = models.CharField(
@@ -223,7 +348,7 @@ class AJob(models.Model):
         help_text=_("Human readable identifier, as provided by the submitter"),
         validators=[RegexValidator(regex=IDENTIFIER_REGEX)],
     )
-    slug = AutoSlugField(
+    slug = SequentialSlugField(
         db_index=True,
         editable=True,
         help_text=_(
@@ -246,6 +371,27 @@ class AJob(models.Model):
         ),
     )  # Default is set on save()
     error = models.TextField(null=True, editable=False)
+    completion = models.FloatField(
+        default=0,
+        editable=False,
+        help_text=_("Fraction of the job done, between 0 and 1"),
+    )
+    progress_message = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        help_text=_("Latest progress report"),
+    )
+    version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text=_("Incremented on every update of the job"),
+    )
+    disk_usage = models.BigIntegerField(
+        default=0,
+        editable=False,
+        help_text=_("Bytes stored for the job, updated as its files are written"),
+    )
 
     def __str__(self):
         return str(
@@ -272,26 +418,77 @@ class AJob(models.Model):
                         field
                     )
                 )
+            self.disk_usage += file.size
             # Create new filename, using primary key and file extension
             old_filename = file.name
             new_filename = file.field.upload_to(self, os.path.basename(old_filename))
-            # TODO: try this instead: https://docs.djangoproject.com/en/1.11/topics/files/#using-files-in-models
-            # Create new file and remove old one
-            file.storage.save(new_filename, file)
-            file.name = new_filename
-            file.close()
-            file.storage.delete(old_filename)
+            file.name = _move_file(file, new_filename)
             getattr(self, "_tmp_files").remove(field)
-        import shutil
-
         shutil.rmtree(get_absolute_path(self, self.upload_to_root))
         setattr(self, "_tmp_id", 0)
 
+    def _prepare_tmp_upload(self, tmp_id=None):
+        setattr(self, "upload_to_data", getattr(self, "upload_to_data", None))
+        if tmp_id is None:
+            tmp_id = rnd.randrange(10 ** 6, 10 ** 7)
+        setattr(self, "_tmp_id", tmp_id)
+
+    def _required_file_attnames(self):
+        return [
+            field if isinstance(field, str) else field.attname
+            for field in getattr(self, self.REQUIRED_USER_FILES_ATTRNAME)
+        ]
+
+    def _required_files_size(self):
+        files = (getattr(self, attname) for attname in self._required_file_attnames())
+        return sum(file.size for file in files if file)
+
     def save(self, *args, results_exist_ok=False, **kwargs):
-        created = not self.pk
-        if created and getattr(self, "required_user_files", []):
-            setattr(self, "upload_to_data", getattr(self, "upload_to_data", None))
-            setattr(self, "_tmp_id", rnd.randrange(10 ** 6, 10 ** 7))
+        """
+        On creation, the closure is set from ``settings.TTL`` if not given, and written along with the job.
+
+        Required user files are uploaded in a temporary folder until the primary key is known, then moved to their
+        final location, which costs a second write. Set the primary key before saving to upload them straight to their
+        final location instead, and pass ``force_insert=True`` to skip checking whether a job with that primary key
+        exists, which would be overwritten otherwise.
+
+        Parameters
+        ----------
+        results_exist_ok : bool
+            Whether the results folder may already exist on creation, ignored if ``settings.LAZY_RESULTS_FOLDER``
+
+        """
+        created = self._state.adding and (
+            not self.pk
+            or kwargs.get("force_insert", False)
+            # Otherwise, an existing job is overwritten
+            or not self.__class__._default_manager.filter(pk=self.pk).exists()
+        )
+        move_files = (
+            created and not self.pk and getattr(self, "required_user_files", [])
+        )
+        if move_files:
+            self._prepare_tmp_upload()
+        elif created and self.pk:
+            # Skip the UPDATE attempt Django makes for instances with a primary key
+            kwargs["force_insert"] = True
+        if created and self.closure is None and settings.TTL.seconds > 0:
+            # Set timeout
+            self.closure = timezone.now() + settings.TTL
+        if created:
+            size = (
+                self._required_files_size()
+                if getattr(self, "required_user_files", [])
+                else 0
+            )
+            self.check_disk_quota(size)
+            if not move_files:
+                # Moved files are accounted for once moved
+                self.disk_usage += size
+        if not created:
+            self._bump_version()
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "version"}
         try:
             super(AJob, self).save(*args, **kwargs)  # Call the "real" save() method.
         except AttributeError as ae:
@@ -302,30 +499,368 @@ class AJob(models.Model):
                     )
                 ) from None
             raise ae
-        if created:
-            dirty = False
-            if settings.TTL.seconds > 0:
-                # Set timeout
-                self.closure = self.timestamp + settings.TTL
-                dirty = True  # Write closure to DB
-            if getattr(self, "required_user_files", []):
-                self._move_data_from_tmp_to_upload()
-                dirty = True  # Persist file changes
-            if dirty:
-                super(AJob, self).save()
+        finally:
+            self._forget_version()
+        if not created:
+            # The version changed anyway
+            state_cache.invalidate(self)
+        if move_files:
+            self._move_data_from_tmp_to_upload()
+            # Persist file changes
+            super(AJob, self).save(
+                update_fields=[*self._required_file_attnames(), "disk_usage"]
+            )
+        if created and not settings.LAZY_RESULTS_FOLDER:
             # Ensure the destination folder exists (may create some issues else, depending on application usage)
-            os.makedirs(
-                get_absolute_path(self, self.upload_to_results),
-                exist_ok=results_exist_ok,
+            self.create_results_folder(exist_ok=results_exist_ok)
+
+    @classmethod
+    def bulk_create_jobs(cls, jobs, batch_size=None):
+        """
+        Create many jobs at once, e.g. for batch imports.
+
+        Closures and slugs are set in-process and the jobs inserted with ``bulk_create``. Required user files are
+        then moved out of the temporary folder and results folders are created, in a single pass over the jobs.
+
+        Note that ``save()`` is not called, nor are the ``pre_save`` and ``post_save`` signals sent.
+
+        Parameters
+        ----------
+        jobs : iterable of AJob
+            Unsaved jobs, instances of `cls`
+        batch_size : int
+            Maximum number of jobs inserted per query
+
+        Returns
+        -------
+        list of JobHolder
+            Holders of the created jobs, in the same order, ready to be sent into `canvas.chain`
+
+        """
+        from .jobholder import JobHolder
+
+        jobs = list(jobs)
+        move_files = getattr(cls, "required_user_files", [])
+        if cls._has_disk_quota():
+            requested = {}
+            for job in jobs:
+                size = job._required_files_size() if move_files else 0
+                requested[job.identifier] = requested.get(job.identifier, 0) + size
+            cls._check_disk_quota(requested)
+        closure = timezone.now() + settings.TTL
+        # Jobs sharing a temporary folder would remove it for each other once their files are moved
+        tmp_ids = rnd.sample(range(10 ** 6, 10 ** 7), len(jobs)) if move_files else ()
+        for job, tmp_id in zip(jobs, tmp_ids):
+            job._prepare_tmp_upload(tmp_id)
+        for job in jobs:
+            if job.closure is None and settings.TTL.seconds > 0:
+                job.closure = closure
+        cls.objects.bulk_create(jobs, batch_size=batch_size)
+        missing = [job for job in jobs if job.pk is None]
+        # Primary keys are not returned by every database backend, but slugs are unique
+        ops = connections[router.db_for_write(cls)].ops
+        lookup_size = batch_size or ops.bulk_batch_size(["slug"], missing) or 1
+        for i in range(0, len(missing), lookup_size):
+            batch = {job.slug: job for job in missing[i : i + lookup_size]}
+            for slug, pk in cls.objects.filter(slug__in=batch).values_list(
+                "slug", "pk"
+            ):
+                batch[slug].pk = pk
+        for job in jobs:
+            if move_files:
+                job._move_data_from_tmp_to_upload()
+            if not settings.LAZY_RESULTS_FOLDER:
+                job.create_results_folder(exist_ok=False)
+        if move_files and jobs:
+            cls.objects.bulk_update(
+                jobs,
+                [*jobs[0]._required_file_attnames(), "disk_usage"],
+                batch_size=batch_size,
+            )
+        return [JobHolder(job) for job in jobs]
+
+    def create_results_folder(self, exist_ok=True):
+        """
+        Create the folder where the results of the job are stored, along with its parents.
+
+        Parameters
+        ----------
+        exist_ok : bool
+
+        Returns
+        -------
+        str
+            Absolute path to the results folder
+
+        """
+        path = get_absolute_path(self, self.upload_to_results)
+        os.makedirs(path, exist_ok=exist_ok)
+        return path
+
+    def save_result(self, filename, content):
+        """
+        Write a file in the results folder of the job, replacing any file with the same name, and account for its
+        size in `disk_usage`.
+
+        Tasks writing their results by other means should call `update_disk_usage` instead.
+
+        Parameters
+        ----------
+        filename : str
+            Relative to the results folder
+        content : bytes or str
+            Encoded in UTF-8 if str
+
+        Returns
+        -------
+        str
+            Absolute path to the file
+
+        Raises
+        ------
+        DiskQuotaExceeded
+            If the file does not fit in the quotas, nothing is written then
+
+        """
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        path = get_absolute_path(self, self.upload_to_results, filename)
+        try:
+            delta = len(content) - os.path.getsize(path)
+        except OSError:
+            delta = len(content)
+        if delta > 0:
+            self.check_disk_quota(delta)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(content)
+        self.update_disk_usage(delta)
+        return path
+
+    def update_disk_usage(self, delta):
+        """
+        Add `delta` bytes to the disk usage of the job, atomically in database.
+
+        The field is loaded again on access.
+
+        Parameters
+        ----------
+        delta : int
+            Negative if files were removed
+
+        """
+        _add_disk_usage(self.__class__, self.pk, delta)
+        self.__dict__.pop("disk_usage", None)
+
+    @classmethod
+    def get_disk_usage(cls, identifier=None):
+        """
+        Parameters
+        ----------
+        identifier : str
+            Only count the jobs with this identifier
+
+        Returns
+        -------
+        int
+            Bytes stored by the jobs of the class, aggregated in database
+
+        """
+        jobs = cls.objects.all()
+        if identifier is not None:
+            jobs = jobs.filter(identifier=identifier)
+        return jobs.aggregate(total=models.Sum("disk_usage"))["total"] or 0
+
+    def check_disk_quota(self, requested=0):
+        """
+        Check that storing `requested` more bytes for this job fits in ``settings.DISK_QUOTA_PER_CLASS`` and
+        ``settings.DISK_QUOTA_PER_IDENTIFIER``. Jobs without identifier are only subject to the quota of their class.
+
+        Called when jobs and data files are created, and by `save_result`. Nothing is queried if no quota is set.
+
+        Parameters
+        ----------
+        requested : int
+            In bytes
+
+        Raises
+        ------
+        DiskQuotaExceeded
+
+        """
+        if self._has_disk_quota():
+            self._check_disk_quota({self.identifier: requested})
+
+    @staticmethod
+    def _has_disk_quota():
+        return (
+            settings.DISK_QUOTA_PER_CLASS is not None
+            or settings.DISK_QUOTA_PER_IDENTIFIER is not None
+        )
+
+    @classmethod
+    def _check_disk_quota(cls, requested):
+        """
+        Parameters
+        ----------
+        requested : dict
+            Bytes to be stored per identifier
+
+        """
+        quota = settings.DISK_QUOTA_PER_CLASS
+        if quota is not None:
+            usage, total = cls.get_disk_usage(), sum(requested.values())
+            if usage + total > quota:
+                raise DiskQuotaExceeded(quota, usage, total)
+        quota = settings.DISK_QUOTA_PER_IDENTIFIER
+        identifiers = [identifier for identifier in requested if identifier]
+        if quota is not None and identifiers:
+            usages = dict(
+                cls.objects.filter(identifier__in=identifiers)
+                .order_by()
+                .values_list("identifier")
+                .annotate(models.Sum("disk_usage"))
             )
+            for identifier in identifiers:
+                usage = usages.get(identifier) or 0
+                if usage + requested[identifier] > quota:
+                    raise DiskQuotaExceeded(
+                        quota, usage, requested[identifier], identifier
+                    )
+
+    def buffered_save(self, update_fields):
+        """
+        Save `update_fields` later, along with other updates of jobs, see `WriteBehindBuffer`.
+
+        Meant for frequent updates, e.g. progress reports. Only the latest value of each field is written. Pending
+        updates are always written when the job is stopped or failed.
 
-    def progress(self, new_state):
+        Parameters
+        ----------
+        update_fields : iterable of str
+
+        """
+        write_behind.add(self, update_fields)
+
+    def report_progress(self, done, total=None, message=None):
+        """
+        Report the progress of the job, e.g. from within the loop of a task.
+
+        Reports are throttled: one is only written if ``settings.PROGRESS_MIN_INTERVAL`` seconds have elapsed since the
+        previous one, and if the completion changed by at least ``settings.PROGRESS_MIN_DELTA`` or the message
+        changed. Completion of the job is always written. Writes are buffered, see `buffered_save`.
+
+        Parameters
+        ----------
+        done : int or float
+            Amount of work done, or fraction of the job done if `total` is not given
+        total : int or float
+            Total amount of work
+        message : str
+            Optional description of the current step
+
+        Returns
+        -------
+        bool
+            Whether the report is to be written
+
+        """
+        if total is None:
+            completion = done
+        else:
+            completion = done / total if total else 1.0
+        completion = min(max(completion, 0.0), 1.0)
+        now = time.monotonic()
+        last = getattr(self, "_last_report", None)
+        if last is not None and completion < 1:
+            last_time, last_completion = last
+            if now - last_time < settings.PROGRESS_MIN_INTERVAL:
+                return False
+            if abs(completion - last_completion) < settings.PROGRESS_MIN_DELTA and (
+                message is None or message == self.progress_message
+            ):
+                return False
+        self._last_report = (now, completion)
+        self.completion = completion
+        update_fields = ["completion"]
+        if message is not None:
+            max_length = self._meta.get_field("progress_message").max_length
+            self.progress_message = message[:max_length]
+            update_fields.append("progress_message")
+        self.buffered_save(update_fields)
+        return True
+
+    def transition(self, new_state, **fields):
+        """
+        Atomically move the job to `new_state`, provided that its state in database allows it.
+
+        The check and the write are performed by a single conditional ``UPDATE``, so that concurrent workers cannot
+        override each other, e.g. a completed job is never set back to running.
+
+        Parameters
+        ----------
+        new_state : EState
+        fields
+            Other fields to write along with the state
+
+        Returns
+        -------
+        bool
+            Whether the transition took effect. If not, the job is left untouched
+
+        """
+        updated = self._transition_queryset(new_state).update(
+            state=new_state, version=_next_version(), **fields
+        )
+        if not self._transitioned(updated, new_state, fields):
+            return False
+        self._notify_update(("state", *fields))
+        return True
+
+    async def atransition(self, new_state, **fields):
+        """
+        Asynchronous counterpart of `transition`.
+        """
+        updated = await _acall(
+            self._transition_queryset(new_state),
+            "update",
+            state=new_state,
+            version=_next_version(),
+            **fields
+        )
+        if not self._transitioned(updated, new_state, fields):
+            return False
+        # Neither the receivers nor the transaction hooks are safe to call from an asynchronous context
+        await _sync_to_async(self._notify_update)(("state", *fields))
+        return True
+
+    def _transition_queryset(self, new_state):
+        allowed = self.ALLOWED_TRANSITIONS.get(new_state, ())
+        return self.__class__.objects.filter(pk=self.pk, state__in=allowed)
+
+    def _transitioned(self, updated, new_state, fields):
+        if not updated:
+            return False
+        self._forget_version()
+        self.state = new_state
+        for name, value in fields.items():
+            setattr(self, name, value)
+        return True
+
+    def _notify_update(self, fields):
+        job_updated.send(sender=self.__class__, instance=self, fields=fields)
+
+    def progress(self, new_state, update_fields=()):
         """
         Signal a change in the pipeline
 
+        The change is only applied if allowed by ``ALLOWED_TRANSITIONS``, see `transition`.
+
         Parameters
         ----------
         new_state : EState
+        update_fields : iterable of str
+            Other fields to be written along with the state
 
         Returns
         -------
@@ -334,13 +869,26 @@ class AJob(models.Model):
 
         """
         old_state = self.state
-        self.state = new_state
-        self.save()
+        self.transition(
+            new_state, **{name: getattr(self, name) for name in update_fields}
+        )
+        return old_state
+
+    async def aprogress(self, new_state, update_fields=()):
+        """
+        Asynchronous counterpart of `progress`.
+        """
+        old_state = self.state
+        await self.atransition(
+            new_state, **{name: getattr(self, name) for name in update_fields}
+        )
         return old_state
 
     def start(self):
         """
-        To be called when the job is to be started.
+        To be called when the job is to be started. Has no effect if the job is already running or completed.
+
+        Creates the results folder if ``settings.LAZY_RESULTS_FOLDER``.
 
         Returns
         -------
@@ -349,11 +897,29 @@ class AJob(models.Model):
         started : datetime
 
         """
-        self.started = timezone.now()
-        self.progress(self.EState.RUNNING)
-        logger.debug("Starting {} at {}".format(self, self.started))
+        if self.transition(self.EState.RUNNING, started=timezone.now()):
+            self._started()
+        else:
+            self._refresh_lifecycle()
+            logger.warning("{} has not been started".format(self))
+        return self.state, self.status, self.started
+
+    async def astart(self):
+        """
+        Asynchronous counterpart of `start`.
+        """
+        if await self.atransition(self.EState.RUNNING, started=timezone.now()):
+            self._started()
+        else:
+            await self._arefresh_lifecycle()
+            logger.warning("{} has not been started".format(self))
         return self.state, self.status, self.started
 
+    def _started(self):
+        if settings.LAZY_RESULTS_FOLDER:
+            self.create_results_folder()
+        logger.debug("Starting {} at {}".format(self, self.started))
+
     def stop(self):
         """
         To be called when the job is completed. Can be called multiple times, will only be applied once.
@@ -366,19 +932,143 @@ class AJob(models.Model):
             Duration of the job
 
         """
-        self._set_duration()
-        if self.state is not self.EState.COMPLETED:
-            self.status = (
-                self.EStatus.FAILURE if self.has_failed() else self.EStatus.SUCCESS
-            )
-            self.progress(self.EState.COMPLETED)  # This will also save the job
-            logger.debug(
-                "{} terminated in {}s with status '{}'".format(
-                    self, self.duration, self.status.label
+        return self._stop()
+
+    async def astop(self):
+        """
+        Asynchronous counterpart of `stop`.
+        """
+        return await self._astop()
+
+    def _stop(self, *update_fields):
+        pending, update_fields = self._pop_pending(update_fields)
+        if self.state is self.EState.COMPLETED:
+            update_fields = self._completed_update_fields(update_fields)
+            if update_fields:
+                self.save(update_fields=update_fields)
+        elif self.transition(
+            self.EState.COMPLETED, **self._completion_fields(update_fields)
+        ):
+            self._stopped()
+        else:
+            # Completed in the meantime, the progress written by the completion is kept
+            pending = [name for name in pending if name not in self.PROGRESS_FIELDS]
+            if pending:
+                self.__class__.objects.filter(pk=self.pk).update(
+                    version=_next_version(),
+                    **{name: getattr(self, name) for name in pending}
                 )
-            )
+                self._notify_update(tuple(pending))
+            self._refresh_lifecycle()
         return self.state, self.status, self.duration
 
+    async def _astop(self, *update_fields):
+        pending, update_fields = self._pop_pending(update_fields)
+        if self.state is self.EState.COMPLETED:
+            update_fields = self._completed_update_fields(update_fields)
+            if update_fields:
+                await _acall(self, "save", update_fields=update_fields)
+        elif await self.atransition(
+            self.EState.COMPLETED, **self._completion_fields(update_fields)
+        ):
+            self._stopped()
+        else:
+            # Completed in the meantime, the progress written by the completion is kept
+            pending = [name for name in pending if name not in self.PROGRESS_FIELDS]
+            if pending:
+                await _acall(
+                    self.__class__.objects.filter(pk=self.pk),
+                    "update",
+                    version=_next_version(),
+                    **{name: getattr(self, name) for name in pending}
+                )
+                await _sync_to_async(self._notify_update)(tuple(pending))
+            await self._arefresh_lifecycle()
+        return self.state, self.status, self.duration
+
+    def _pop_pending(self, update_fields):
+        # Buffered updates are written along with the completion
+        pending = write_behind.pop(self)
+        for name, value in pending.items():
+            if name not in update_fields:
+                setattr(self, name, value)
+        return pending, (*update_fields, *pending)
+
+    def _completed_update_fields(self, update_fields):
+        update_fields = list(update_fields)
+        if not self.duration:
+            self._set_duration()
+            update_fields.append("duration")
+        return update_fields
+
+    def _completion_fields(self, update_fields):
+        fields = {name: getattr(self, name) for name in update_fields}
+        fields["duration"] = self.duration or timezone.now() - self.started
+        fields["status"] = (
+            self.EStatus.FAILURE if self.has_failed() else self.EStatus.SUCCESS
+        )
+        if fields["status"] is self.EStatus.SUCCESS:
+            fields["completion"] = 1.0
+        return fields
+
+    def _stopped(self):
+        logger.debug(
+            "{} terminated in {}s with status '{}'".format(
+                self, self.duration, self.status.label
+            )
+        )
+
+    def get_workflow(self):
+        """
+        Hook building the chain of tasks processing the job, e.g. with `canvas.chain`. Required by `rerun`.
+
+        Returns
+        -------
+        celery.canvas.Signature
+
+        """
+        raise NotImplementedError(
+            "{} does not define how to run its jobs".format(self.__class__.__name__)
+        )
+
+    @classmethod
+    def can_rerun(cls):
+        return cls.get_workflow is not AJob.get_workflow
+
+    def rerun(self):
+        """
+        Reset the lifecycle of a completed job and run its workflow again, see `get_workflow`.
+
+        The job is only reset if it is still completed in database, so that a job being run again concurrently is not
+        run twice. Files of the previous run are left untouched. The closure is postponed according to
+        ``settings.TTL``.
+
+        Returns
+        -------
+        celery.result.AsyncResult or None
+            None if the job is not completed
+
+        """
+        workflow = self.get_workflow()
+        fields = {
+            "status": self.EStatus.ACTIVE,
+            "started": None,
+            "duration": None,
+            "error": None,
+            "completion": 0,
+            "progress_message": "",
+        }
+        if self.closure is not None and settings.TTL.seconds > 0:
+            fields["closure"] = timezone.now() + settings.TTL
+        updated = self.__class__.objects.filter(
+            pk=self.pk, state=self.EState.COMPLETED
+        ).update(state=self.EState.CREATED, version=_next_version(), **fields)
+        if not self._transitioned(updated, self.EState.CREATED, fields):
+            return None
+        write_behind.pop(self)
+        self._notify_update(("state", *fields))
+        return workflow.apply_async()
+
     def failed(self, task, exception):
         """
         Mark the job as failed and stop it.
@@ -395,7 +1085,6 @@ class AJob(models.Model):
         TODO
 
         """
-        self._set_duration()
         from json import dumps
 
         self.error = dumps(
@@ -409,7 +1098,7 @@ class AJob(models.Model):
         logger.exception(
             "Task %s failed with following exception: %s", task.__name__, exception
         )
-        return self.stop()
+        return self._stop("error")
 
     def has_failed(self):
         return bool(self.error)
@@ -417,11 +1106,86 @@ class AJob(models.Model):
     def _set_duration(self):
         if not self.duration:
             self.duration = timezone.now() - self.started
-            self.save()
         return self.duration
 
+    @classmethod
+    def get_cached_state(cls, pk):
+        """
+        Lifecycle of a job, from the state cache invalidated on every transition and save, or from the database on a
+        miss. Updates bypassing the jobs, e.g. ``QuerySet.update()``, are not reflected.
+
+        Parameters
+        ----------
+        pk
+            Primary key of the job
+
+        Returns
+        -------
+        dict or None
+            Values of ``statecache.FIELDS``, None if the job does not exist
+
+        """
+        return state_cache.get(cls, pk)
+
+    def _bump_version(self):
+        self.version = _next_version()
+
+    def _forget_version(self):
+        # The version is incremented by the database, it is loaded again on access
+        self.__dict__.pop("version", None)
+
+    def _refresh_lifecycle(self):
+        self.refresh_from_db(fields=self.LIFECYCLE_FIELDS)
+
+    async def _arefresh_lifecycle(self):
+        await _acall(self, "refresh_from_db", fields=self.LIFECYCLE_FIELDS)
+
+    @classmethod
+    def purge_expired(cls, batch_size=None):
+        """
+        Delete the jobs whose closure is over, along with their files.
+
+        Jobs are deleted in batches of consecutive primary keys, so that the expired jobs are never all loaded at
+        once. Files and folders are removed in a single pass, once all batches have been deleted.
+
+        Parameters
+        ----------
+        batch_size : int
+            Maximum number of jobs deleted per query, defaults to ``settings.PURGE_BATCH_SIZE``
+
+        Returns
+        -------
+        PurgeReport
+            rows : int
+                Number of deleted jobs
+            bytes : int
+                Number of bytes freed on the filesystem
+
+        """
+        batch_size = batch_size or settings.PURGE_BATCH_SIZE
+        expired = cls.objects.filter(closure__lt=timezone.now()).order_by("pk")
+        rows = 0
+        last_pk = None
+        with deferred_file_removal() as removals:
+            while True:
+                batch = expired if last_pk is None else expired.filter(pk__gt=last_pk)
+                pks = list(batch.values_list("pk", flat=True)[:batch_size])
+                if not pks:
+                    break
+                _, deleted = expired.filter(pk__gte=pks[0], pk__lte=pks[-1]).delete()
+                rows += deleted.get(cls._meta.label, 0)
+                last_pk = pks[-1]
+        report = PurgeReport(rows, removals.freed)
+        jobs_purged.send(sender=cls, report=report)
+        return report
+
 
 class ADataFile(models.Model):
+    """
+    File uploaded for a job. The size of newly uploaded files is added to the disk usage of the job, and removed
+    along with the files.
+    """
+
     class Meta:
         abstract = True
 
@@ -440,6 +1204,148 @@ class ADataFile(models.Model):
         )  # placeholder, must be overridden by concrete class
         data = models.FileField(upload_to=upload_to_data, max_length=256)
 
+    def save(self, *args, **kwargs):
+        """
+        Raises
+        ------
+        DiskQuotaExceeded
+            If a new file does not fit in the quotas of the job
+
+        """
+        # Replaced files are not removed from the storage, only new files are accounted for
+        size = self.data.size if self.data and not self.data._committed else 0
+        if size and AJob._has_disk_quota():
+            self.job.check_disk_quota(size)
+        super().save(*args, **kwargs)
+        if size:
+            _add_disk_usage(
+                self._meta.get_field("job").related_model, self.job_id, size
+            )
+            job = self._state.fields_cache.get("job")
+            if job is not None:
+                job.__dict__.pop("disk_usage", None)
+
+
+def _add_disk_usage(model, pk, delta):
+    if delta:
+        model.objects.filter(pk=pk).update(disk_usage=models.F("disk_usage") + delta)
+
+
+class _FileRemovals:
+    """
+    Files and folders collected by `deferred_file_removal`, to be removed from the filesystem at once.
+    """
+
+    def __init__(self):
+        self.files = []
+        self.folders = []
+        self.freed = 0
+
+    def remove(self):
+        """
+        Remove the collected files first, then the collected folders.
+
+        Returns
+        -------
+        int
+            Number of bytes freed
+
+        """
+        for file in self.files:
+            try:
+                self.freed += file.size
+            except (OSError, ValueError):
+                # Already gone
+                pass
+            file.delete(save=False)
+        for folder in self.folders:
+            if not os.path.isdir(folder):
+                continue
+            for root, _, filenames in os.walk(folder):
+                for filename in filenames:
+                    try:
+                        self.freed += os.path.getsize(os.path.join(root, filename))
+                    except OSError:
+                        pass
+            shutil.rmtree(folder)
+        self.files, self.folders = [], []
+        return self.freed
+
+
+@contextmanager
+def deferred_file_removal():
+    """
+    Defer the removal of the files of deleted jobs and data files until the end of the block.
+
+    Nested blocks are merged into the outermost one, which performs the removal, even if the block raised.
+
+    Yields
+    ------
+    _FileRemovals
+        Its ``freed`` attribute holds the number of bytes freed, once the outermost block is exited
+
+    """
+    removals = getattr(_deferred, "removals", None)
+    if removals is not None:
+        yield removals
+        return
+    removals = _deferred.removals = _FileRemovals()
+    try:
+        yield removals
+    finally:
+        _deferred.removals = None
+        # Left over by deletions that failed
+        _deleted_jobs().clear()
+        # Also on failure, the rows deleted so far are gone
+        removals.remove()
+
+
+def _remove_file(file):
+    removals = getattr(_deferred, "removals", None)
+    if removals is None:
+        file.delete(save=False)
+    else:
+        removals.files.append(file)
+
+
+def _remove_folder(path):
+    removals = getattr(_deferred, "removals", None)
+    if removals is None:
+        # Never created for jobs not yet started with LAZY_RESULTS_FOLDER
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+    else:
+        removals.folders.append(path)
+
+
+def _deleted_jobs():
+    """
+    Jobs being deleted by this thread, whose data files are deleted along with them.
+    """
+    deleted = getattr(_deferred, "jobs", None)
+    if deleted is None:
+        deleted = _deferred.jobs = set()
+    return deleted
+
+
+@receiver(models.signals.pre_delete)
+def _mark_deleted_job(sender, instance, *args, **kwargs):
+    # Sent for all the collected objects, before the data files of a job are deleted
+    if issubclass(sender, AJob):
+        _deleted_jobs().add((sender, instance.pk))
+
+
+@receiver(models.signals.post_delete)
+def _forget_cached_state(sender, instance, *args, **kwargs):
+    if issubclass(sender, AJob):
+        _deleted_jobs().discard((sender, instance.pk))
+        state_cache.invalidate(instance)
+
+
+@receiver(job_updated)
+def _invalidate_cached_state(sender, instance, *args, **kwargs):
+    state_cache.invalidate(instance)
+
 
 @receiver(models.signals.post_delete,)
 def _autoremove_files(sender, instance, *args, **kwargs):
@@ -462,10 +1368,16 @@ def _autoremove_files(sender, instance, *args, **kwargs):
                     if isinstance(field, str)
                     else getattr(instance, field.attname)
                 )
-                file.delete(save=False)
+                _remove_file(file)
         # Delete all remaining files stored on the filesystem
-        import shutil
-
-        shutil.rmtree(get_absolute_path(instance, instance.upload_to_root))
+        _remove_folder(get_absolute_path(instance, instance.upload_to_root))
     elif issubclass(sender, ADataFile):
-        instance.data.delete(save=False)
+        job_model = sender._meta.get_field("job").related_model
+        if (job_model, instance.job_id) not in _deleted_jobs():
+            try:
+                size = instance.data.size if instance.data else 0
+            except OSError:
+                # Already gone
+                size = 0
+            _add_disk_usage(job_model, instance.job_id, -size)
+        _remove_file(instance.data)
@@ -0,0 +1,105 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.db import models
+from django.dispatch import receiver
+
+from .. import settings
+from .job import AJob, job_updated
+
+
+class JobCache:
+    """
+    Per-process cache of jobs, with least recently used eviction and expiration.
+
+    Copies of the cached jobs are handed out, so that callers never share an instance.
+
+    Parameters
+    ----------
+    ttl : int
+        Time to live of the entries, in seconds. 0 disables the cache
+    maxsize : int
+        Maximum number of entries
+    """
+
+    def __init__(self, ttl, maxsize):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(model, pk):
+        return model._meta.label, pk
+
+    def get(self, model, pk):
+        """
+        Parameters
+        ----------
+        model : type
+            Concrete subclass of AJob
+        pk
+
+        Returns
+        -------
+        AJob or None
+            A copy of the cached job, None if missing or expired
+
+        """
+        if self.ttl <= 0:
+            return None
+        key = self._key(model, pk)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expiry, job = entry
+            if expiry < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return copy.copy(job)
+
+    def put(self, job):
+        """
+        Parameters
+        ----------
+        job : AJob
+            Saved job, a copy of which is cached
+
+        """
+        if self.ttl <= 0:
+            return
+        key = self._key(job.__class__, job.pk)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, copy.copy(job))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, job):
+        """
+        Parameters
+        ----------
+        job : AJob
+
+        """
+        with self._lock:
+            self._entries.pop(self._key(job.__class__, job.pk), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+job_cache = JobCache(settings.JOB_CACHE_TTL, settings.JOB_CACHE_SIZE)
+
+
+@receiver(models.signals.post_save)
+@receiver(models.signals.post_delete)
+@receiver(job_updated)
+def _invalidate_cached_job(sender, instance, *args, **kwargs):
+    if issubclass(sender, AJob):
+        job_cache.invalidate(instance)
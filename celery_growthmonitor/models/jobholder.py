@@ -1,10 +1,34 @@
 import logging
+from functools import lru_cache
 
-from celery_growthmonitor.models.job import AJob
+from celery_growthmonitor.models.job import AJob, _acall
+from celery_growthmonitor.models.jobcache import job_cache
+from celery_growthmonitor.models.statecache import state_cache
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def get_job_class(app_label, class_name):
+    """
+    Memoized resolution of a job model.
+
+    Parameters
+    ----------
+    app_label : str
+    class_name : str
+
+    Returns
+    -------
+    type
+        Concrete subclass of AJob
+
+    """
+    from django.apps import apps
+
+    return apps.get_model(app_label, class_name)
+
+
 class JobHolder:
     """
     Keep this object as simple as possible, so that it is easily serializable (pickle, json, and so on).
@@ -20,11 +44,53 @@ class JobHolder:
         self._job_app_label = self._job._meta.app_label
         self._job_cls = self._job.__class__.__name__
 
+    def pack(self):
+        """
+        Compact representation of the holder, without the job.
+
+        Returns
+        -------
+        list
+            Primary key and label of the job model
+
+        """
+        return [self._job_pk, "{}.{}".format(self._job_app_label, self._job_cls)]
+
+    @classmethod
+    def unpack(cls, job_pk, job_label):
+        """
+        Build a holder from its compact representation, see `pack`. The job is not loaded.
+
+        Parameters
+        ----------
+        job_pk
+        job_label : str
+            Label of the job model, ``app_label.ClassName``
+
+        Returns
+        -------
+        JobHolder
+
+        """
+        job_holder = cls.__new__(cls)
+        job_holder._job = None
+        job_holder._job_pk = job_pk
+        job_holder._job_app_label, job_holder._job_cls = job_label.split(".")
+        return job_holder
+
     def get_job(self):
         if not self._job:
             self.post_serialization()
         return self.job
 
+    async def aget_job(self):
+        """
+        Asynchronous counterpart of `get_job`.
+        """
+        if not self._job:
+            await self.apost_serialization()
+        return self.job
+
     @property
     def job(self):
         return self._job
@@ -45,9 +111,50 @@ class JobHolder:
         return self
 
     def post_serialization(self):
-        from django.apps import apps
+        """
+        Load the job, from the per-process cache if enabled (see ``settings.JOB_CACHE_TTL``). The lifecycle of a cached
+        job is then refreshed from the shared state cache, see `AJob.get_cached_state`.
+
+        Returns
+        -------
+        JobHolder
+
+        """
+        job_class = self._get_job_class()
+        self._job = self._get_cached_job(job_class)
+        if self._job is None:
+            self._job = job_class.objects.get(pk=self._job_pk)
+            job_cache.put(self._job)
+        return self
+
+    async def apost_serialization(self):
+        """
+        Asynchronous counterpart of `post_serialization`.
 
-        job_class = apps.get_model(self._job_app_label, self._job_cls)
+        Returns
+        -------
+        JobHolder
+
+        """
+        job_class = self._get_job_class()
+        self._job = self._get_cached_job(job_class)
+        if self._job is None:
+            self._job = await _acall(job_class.objects, "get", pk=self._job_pk)
+            job_cache.put(self._job)
+        return self
+
+    def _get_cached_job(self, job_class):
+        job = job_cache.get(job_class, self._job_pk)
+        if job is not None:
+            # The lifecycle may have been updated by another process in the meantime
+            for name, value in (
+                state_cache.get(job_class, self._job_pk, fallback=False) or {}
+            ).items():
+                setattr(job, name, value)
+        return job
+
+    def _get_job_class(self):
+        job_class = get_job_class(self._job_app_label, self._job_cls)
         if self._job_pk is None:
             raise self._job.DoesNotExist(
                 "{} may not yet been saved, but its primary key is required. "
@@ -55,5 +162,4 @@ class JobHolder:
                     self.job, self.pre_serialization.__name__
                 )
             )
-        self._job = job_class.objects.get(pk=self._job_pk)
-        return self
+        return job_class
@@ -0,0 +1,11 @@
+from django.dispatch import Signal
+
+job_updated = Signal()
+"""
+Sent with ``instance`` and ``fields`` arguments when a job is updated without going through ``save()``.
+"""
+
+jobs_purged = Signal()
+"""
+Sent with a ``report`` argument, a `PurgeReport`, when expired jobs of the sender class have been purged.
+"""
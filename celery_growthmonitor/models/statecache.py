@@ -0,0 +1,117 @@
+import time
+
+from django.core.cache import caches
+from django.db import router, transaction
+
+from .. import settings
+
+FIELDS = (
+    "version",
+    "state",
+    "status",
+    "completion",
+    "progress_message",
+    "started",
+    "duration",
+    "error",
+)
+"""Fields of the jobs kept in the state cache"""
+
+
+class StateCache:
+    """
+    Cache of the lifecycle of jobs, shared by all processes through a Django cache. It serves both
+    `AJob.get_cached_state` and `views.JobStatusView`.
+
+    Values are cached per generation of each job, which is bumped whenever the job is updated, once the transaction is
+    committed. Values read from the database before an update are thus stored under a generation that is not read
+    anymore. They are not written through, as the version of the jobs is only known by the database.
+
+    Parameters
+    ----------
+    alias : str
+        Alias of the Django cache
+    timeout : int
+        Time the values are kept, in seconds
+    """
+
+    def __init__(self, alias, timeout):
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def _cache(self):
+        return caches[self.alias]
+
+    @staticmethod
+    def _key(model, pk, generation):
+        return "{}:{}:{}:{}".format(__name__, model._meta.label_lower, pk, generation)
+
+    @staticmethod
+    def _generation_key(model, pk):
+        return "{}:{}:{}:generation".format(__name__, model._meta.label_lower, pk)
+
+    @staticmethod
+    def _initial_generation():
+        # Beyond the generations of an evicted counter, unless it was bumped more than once per microsecond
+        return int(time.time() * 10 ** 6)
+
+    def _generation(self, model, pk):
+        key = self._generation_key(model, pk)
+        generation = self._cache.get(key)
+        if generation is None:
+            self._cache.add(key, self._initial_generation(), self.timeout)
+            generation = self._cache.get(key)
+        return generation
+
+    def get(self, model, pk, fallback=True):
+        """
+        Parameters
+        ----------
+        model : type
+            Concrete subclass of AJob
+        pk
+        fallback : bool
+            Whether to read the values from the database on a miss
+
+        Returns
+        -------
+        dict or None
+            Values of ``FIELDS``, None if missing and not read, or if the job does not exist
+
+        """
+        generation = self._generation(model, pk)
+        key = self._key(model, pk, generation)
+        if generation is not None:
+            values = self._cache.get(key)
+            if values is not None:
+                return values
+        if not fallback:
+            return None
+        values = model.objects.filter(pk=pk).values(*FIELDS).first()
+        if values is not None and generation is not None:
+            self._cache.add(key, values, self.timeout)
+        return values
+
+    def invalidate(self, job):
+        """
+        Bump the generation of the job once the transaction is committed.
+
+        Parameters
+        ----------
+        job : AJob
+
+        """
+        key = self._generation_key(job.__class__, job.pk)
+
+        def bump():
+            try:
+                self._cache.incr(key)
+            except ValueError:
+                # Missing, values of previous generations are unreachable anyway
+                self._cache.add(key, self._initial_generation(), self.timeout)
+
+        transaction.on_commit(bump, using=router.db_for_write(job.__class__))
+
+
+state_cache = StateCache(settings.CACHE, settings.STATE_CACHE_TIMEOUT)
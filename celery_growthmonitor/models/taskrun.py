@@ -0,0 +1,223 @@
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from functools import lru_cache
+
+from celery import signals as celery_signals
+from django.db import connections, models
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+
+from .. import settings
+from .job import AJob
+from .jobholder import JobHolder, get_job_class
+
+logger = logging.getLogger(__name__)
+
+
+class ATaskRun(models.Model):
+    """
+    Run of a Celery task on behalf of a job.
+
+    Runs are recorded automatically for the tasks receiving a `JobHolder`, provided that a concrete subclass of
+    ATaskRun refers to the job class through its ``job`` field, which must be overridden. Failed tasks are recorded
+    with the ``FAILURE`` outcome.
+    """
+
+    class Meta:
+        abstract = True
+
+    job = models.ForeignKey(
+        AJob, on_delete=models.CASCADE
+    )  # placeholder, must be overridden by concrete class
+    task_name = models.CharField(max_length=255)
+    task_id = models.CharField(max_length=255, db_index=True)
+    started = models.DateTimeField()
+    ended = models.DateTimeField()
+    runtime = models.DurationField()
+    outcome = models.CharField(
+        max_length=16, help_text=_("Celery state of the task once run")
+    )
+
+    def __str__(self):
+        return "{} {} ({})".format(self.task_name, self.task_id, self.outcome)
+
+
+@lru_cache(maxsize=None)
+def get_task_run_class(job_class):
+    """
+    Parameters
+    ----------
+    job_class : type
+        Concrete subclass of AJob
+
+    Returns
+    -------
+    type or None
+        Concrete subclass of ATaskRun referring to `job_class`, if any
+
+    """
+    for relation in job_class._meta.related_objects:
+        if (
+            issubclass(relation.related_model, ATaskRun)
+            and relation.field.name == "job"
+        ):
+            return relation.related_model
+    return None
+
+
+def _find_job_holder(args):
+    if args:
+        first = args[0]
+        if isinstance(first, JobHolder):
+            return first
+        if isinstance(first, (tuple, list)) and first:
+            if isinstance(first[0], JobHolder):
+                return first[0]
+    return None
+
+
+class TaskRunRecorder:
+    """
+    Record the runs of tasks from Celery signals, and write them in bulk.
+
+    Pending runs are written once `interval` seconds have elapsed since the last flush, or once `size` runs are
+    pending, whichever comes first. Without further runs, they are written by a timer, so that they are not kept in
+    memory by an idle worker. They are also written when the worker shuts down, and at exit.
+
+    Parameters
+    ----------
+    interval : float
+        Maximum age of the pending runs, in seconds
+    size : int
+        Maximum number of pending runs
+    """
+
+    def __init__(self, interval, size):
+        self.interval = interval
+        self.size = size
+        self._running = {}
+        self._pending = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._timer = None
+
+    def started(self, task_id, task, args):
+        holder = _find_job_holder(args)
+        if holder is None or holder._job_pk is None:
+            return
+        job_class = get_job_class(holder._job_app_label, holder._job_cls)
+        run_class = get_task_run_class(job_class)
+        if run_class is None:
+            return
+        with self._lock:
+            self._running[task_id] = (
+                run_class,
+                holder._job_pk,
+                task.name,
+                timezone.now(),
+                time.monotonic(),
+            )
+
+    def finished(self, task_id, state):
+        with self._lock:
+            running = self._running.pop(task_id, None)
+            if running is not None:
+                run_class, job_pk, task_name, started, start = running
+                runtime = timedelta(seconds=time.monotonic() - start)
+                self._pending.append(
+                    run_class(
+                        job_id=job_pk,
+                        task_name=task_name,
+                        task_id=task_id,
+                        started=started,
+                        ended=started + runtime,
+                        runtime=runtime,
+                        outcome=state or "",
+                    )
+                )
+            due = self._pending and (
+                len(self._pending) >= self.size
+                or time.monotonic() - self._last_flush >= self.interval
+            )
+            if self._pending and not due and self._timer is None:
+                self._timer = threading.Timer(self.interval, self._flush_on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Write all pending runs, with two queries per run class.
+
+        Runs of jobs deleted in the meantime, e.g. purged, are dropped.
+
+        Returns
+        -------
+        int
+            Number of written runs
+
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+            self._cancel_timer()
+        groups = defaultdict(list)
+        for run in pending:
+            groups[run.__class__].append(run)
+        written = 0
+        for run_class, runs in groups.items():
+            job_class = run_class._meta.get_field("job").related_model
+            existing = set(
+                job_class.objects.filter(
+                    pk__in={run.job_id for run in runs}
+                ).values_list("pk", flat=True)
+            )
+            runs = [run for run in runs if run.job_id in existing]
+            run_class.objects.bulk_create(runs)
+            written += len(runs)
+        return written
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Could not record task runs")
+        finally:
+            # Connections are opened per thread
+            connections.close_all()
+
+
+task_runs = TaskRunRecorder(settings.BUFFER_INTERVAL, settings.BUFFER_SIZE)
+
+
+@celery_signals.task_prerun.connect
+def _record_task_start(task_id=None, task=None, args=None, **kwargs):
+    task_runs.started(task_id, task, args)
+
+
+@celery_signals.task_postrun.connect
+def _record_task_end(task_id=None, state=None, **kwargs):
+    try:
+        task_runs.finished(task_id, state)
+    except Exception:
+        logger.exception("Could not record task runs")
+
+
+@atexit.register
+@celery_signals.worker_process_shutdown.connect
+@celery_signals.worker_shutdown.connect
+def _flush_task_runs(*args, **kwargs):
+    try:
+        task_runs.flush()
+    except Exception:
+        logger.exception("Could not record task runs")
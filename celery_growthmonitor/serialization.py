@@ -0,0 +1,134 @@
+"""
+Compact serializers for the messages of the chains, registered in kombu.
+
+`JobHolder` and `ReturnTuple` are encoded as small tagged values, e.g. ``{"__jh": [1, "app.Job"]}``, so that chains
+can run without pickle:
+
+* ``growthmonitor``, based on JSON
+* ``growthmonitor-msgpack``, based on msgpack ext types, if msgpack is installed
+
+Set e.g. ``CELERY_TASK_SERIALIZER = "growthmonitor"`` and ``CELERY_RESULT_SERIALIZER = "growthmonitor"``, and add
+the serializer to ``CELERY_ACCEPT_CONTENT``.
+"""
+import importlib
+import json
+
+from kombu.serialization import register
+from kombu.utils import json as kombu_json
+
+from .models.jobholder import JobHolder
+from .tasks import ReturnTuple
+
+msgpack = importlib.util.find_spec("msgpack")
+if msgpack:
+    import msgpack
+
+JSON = "growthmonitor"
+JSON_CONTENT_TYPE = "application/x-growthmonitor+json"
+MSGPACK = "growthmonitor-msgpack"
+MSGPACK_CONTENT_TYPE = "application/x-growthmonitor+msgpack"
+
+_JOB_HOLDER_TAG = "__jh"
+_RETURN_TUPLE_TAG = "__rt"
+_JOB_HOLDER_CODE = 1
+_RETURN_TUPLE_CODE = 2
+
+
+# ==================================================
+#   JSON
+# ==================================================
+
+
+def _tag(obj):
+    if isinstance(obj, JobHolder):
+        return {_JOB_HOLDER_TAG: obj.pack()}
+    if isinstance(obj, ReturnTuple):
+        return {_RETURN_TUPLE_TAG: [_tag(obj.job_holder), _tag(obj.results)]}
+    if isinstance(obj, (list, tuple)):
+        return [_tag(item) for item in obj]
+    if isinstance(obj, dict):
+        return {key: _tag(value) for key, value in obj.items()}
+    return obj
+
+
+_default_object_hook = getattr(kombu_json, "object_hook", None)
+
+
+def _untag(obj):
+    if len(obj) == 1:
+        if _JOB_HOLDER_TAG in obj:
+            return JobHolder.unpack(*obj[_JOB_HOLDER_TAG])
+        if _RETURN_TUPLE_TAG in obj:
+            job_holder, results = obj[_RETURN_TUPLE_TAG]
+            return ReturnTuple(job_holder, tuple(results))
+    if _default_object_hook:
+        return _default_object_hook(obj)
+    return obj
+
+
+def dumps_json(obj):
+    return json.dumps(_tag(obj), cls=kombu_json.JSONEncoder, separators=(",", ":"))
+
+
+def loads_json(data):
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode("utf-8")
+    return json.loads(data, object_hook=_untag)
+
+
+# ==================================================
+#   MSGPACK
+# ==================================================
+
+
+def _default(obj):
+    if isinstance(obj, JobHolder):
+        return msgpack.ExtType(_JOB_HOLDER_CODE, dumps_msgpack(obj.pack()))
+    if isinstance(obj, ReturnTuple):
+        return msgpack.ExtType(
+            _RETURN_TUPLE_CODE, dumps_msgpack([obj.job_holder, list(obj.results)])
+        )
+    # Because of strict types, neither tuples nor subclasses of list and dict are serialized natively
+    if isinstance(obj, (list, tuple)):
+        return list(obj)
+    if isinstance(obj, dict):
+        return dict(obj)
+    raise TypeError("Cannot serialize {!r}".format(obj))
+
+
+def _ext_hook(code, data):
+    if code == _JOB_HOLDER_CODE:
+        return JobHolder.unpack(*loads_msgpack(data))
+    if code == _RETURN_TUPLE_CODE:
+        job_holder, results = loads_msgpack(data)
+        return ReturnTuple(job_holder, tuple(results))
+    return msgpack.ExtType(code, data)
+
+
+def dumps_msgpack(obj):
+    return msgpack.packb(obj, default=_default, strict_types=True, use_bin_type=True)
+
+
+def loads_msgpack(data):
+    return msgpack.unpackb(bytes(data), ext_hook=_ext_hook, raw=False)
+
+
+def register_serializers():
+    """
+    Register the serializers in kombu, see ``CeleryGrowthMonitorConfig.ready()``.
+    """
+    register(
+        JSON,
+        dumps_json,
+        loads_json,
+        content_type=JSON_CONTENT_TYPE,
+        content_encoding="utf-8",
+    )
+    if msgpack:
+        register(
+            MSGPACK,
+            dumps_msgpack,
+            loads_msgpack,
+            content_type=MSGPACK_CONTENT_TYPE,
+            content_encoding="binary",
+        )
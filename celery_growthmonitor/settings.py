@@ -23,3 +23,165 @@ Time to live. After that time, jobs should be dropped from file system.
 APP_MEDIA_ROOT = getattr(
     django_settings, "{}_MEDIA_ROOT".format(appConfig.name.upper()), ""
 )
+
+PURGE_BATCH_SIZE = getattr(
+    django_settings, "{}_PURGE_BATCH_SIZE".format(appConfig.name.upper()), 500
+)
+"""
+Maximum number of expired jobs deleted per query when purging.
+"""
+
+PURGE_IN_CHAIN = getattr(
+    django_settings, "{}_PURGE_IN_CHAIN".format(appConfig.name.upper()), True
+)
+"""
+Whether `canvas.chain` appends a purge of the expired jobs to every chain. Disable it when `tasks.reap_old_jobs` is
+scheduled with Celery beat instead.
+"""
+
+CACHE = getattr(django_settings, "{}_CACHE".format(appConfig.name.upper()), "default")
+"""
+Alias of the Django cache used for locks and shared state.
+"""
+
+REAPER_LEASE = getattr(
+    django_settings, "{}_REAPER_LEASE".format(appConfig.name.upper()), 15 * 60
+)
+"""
+Lifetime of the lock held by `tasks.reap_old_jobs`, in seconds. Should exceed the duration of a sweep.
+"""
+
+JOB_CACHE_TTL = getattr(
+    django_settings, "{}_JOB_CACHE_TTL".format(appConfig.name.upper()), 0
+)
+"""
+Time to live of the jobs cached by each worker process when loaded by a `JobHolder`, in seconds. 0 disables the cache.
+"""
+
+JOB_CACHE_SIZE = getattr(
+    django_settings, "{}_JOB_CACHE_SIZE".format(appConfig.name.upper()), 256
+)
+"""
+Maximum number of jobs cached by each worker process, the least recently used ones are evicted first.
+"""
+
+LAZY_RESULTS_FOLDER = getattr(
+    django_settings, "{}_LAZY_RESULTS_FOLDER".format(appConfig.name.upper()), False
+)
+"""
+Whether the results folder of a job is created when the job is started, instead of when it is created. Tasks may also
+create it with `AJob.create_results_folder`.
+"""
+
+BUFFER_INTERVAL = getattr(
+    django_settings, "{}_BUFFER_INTERVAL".format(appConfig.name.upper()), 1
+)
+"""
+Maximum time updates buffered by `AJob.buffered_save` are kept in memory, in seconds.
+"""
+
+BUFFER_SIZE = getattr(
+    django_settings, "{}_BUFFER_SIZE".format(appConfig.name.upper()), 100
+)
+"""
+Maximum number of jobs with updates buffered by `AJob.buffered_save`, in each process.
+"""
+
+PROGRESS_MIN_INTERVAL = getattr(
+    django_settings, "{}_PROGRESS_MIN_INTERVAL".format(appConfig.name.upper()), 1
+)
+"""
+Minimum time between two progress reports of a job written by `AJob.report_progress`, in seconds.
+"""
+
+PROGRESS_MIN_DELTA = getattr(
+    django_settings, "{}_PROGRESS_MIN_DELTA".format(appConfig.name.upper()), 0.01
+)
+"""
+Minimum change of completion between two progress reports of a job written by `AJob.report_progress`.
+"""
+
+METRICS_CACHE_TIMEOUT = getattr(
+    django_settings, "{}_METRICS_CACHE_TIMEOUT".format(appConfig.name.upper()), 60
+)
+"""
+Time the metrics exposed by `metrics.collect_metrics` are cached, in seconds.
+"""
+
+METRICS_DURATION_BUCKETS = getattr(
+    django_settings,
+    "{}_METRICS_DURATION_BUCKETS".format(appConfig.name.upper()),
+    (1, 10, 60, 300, 900, 3600, 4 * 3600, 24 * 3600),
+)
+"""
+Upper bounds of the buckets of the histogram of job durations, in seconds.
+"""
+
+LONGPOLL_TIMEOUT = getattr(
+    django_settings, "{}_LONGPOLL_TIMEOUT".format(appConfig.name.upper()), 30
+)
+"""
+Maximum time a request to `views.JobStatusView` waits for a change of the job, in seconds.
+"""
+
+LONGPOLL_INTERVAL = getattr(
+    django_settings, "{}_LONGPOLL_INTERVAL".format(appConfig.name.upper()), 0.5
+)
+"""
+Time between two checks of the cached status of a job by `views.JobStatusView`, in seconds.
+"""
+
+STATE_CACHE_TIMEOUT = getattr(
+    django_settings, "{}_STATE_CACHE_TIMEOUT".format(appConfig.name.upper()), 3600
+)
+"""
+Maximum time the state of a job is kept in the cache, see `AJob.get_cached_state` and `views.JobStatusView`, in
+seconds. The cached state is invalidated whenever the job is updated.
+"""
+
+ADMIN_COUNT_LIMIT = getattr(
+    django_settings, "{}_ADMIN_COUNT_LIMIT".format(appConfig.name.upper()), 10000
+)
+"""
+Number of jobs above which the admin changelist shows an estimated or capped count instead of an exact one, see
+`admin.EstimatedCountPaginator`.
+"""
+
+ADMIN_ACTION_CHUNK_SIZE = getattr(
+    django_settings, "{}_ADMIN_ACTION_CHUNK_SIZE".format(appConfig.name.upper()), 500
+)
+"""
+Number of jobs processed per task by the background actions of `admin.AJobAdmin`.
+"""
+
+OPERATION_TIMEOUT = getattr(
+    django_settings, "{}_OPERATION_TIMEOUT".format(appConfig.name.upper()), 24 * 3600
+)
+"""
+Time the progress of background operations is kept in the cache, in seconds.
+"""
+
+DISK_QUOTA_PER_CLASS = getattr(
+    django_settings, "{}_DISK_QUOTA_PER_CLASS".format(appConfig.name.upper()), None
+)
+"""
+Maximum number of bytes stored by all the jobs of a class, see `AJob.check_disk_quota`, None for no limit.
+"""
+
+DISK_QUOTA_PER_IDENTIFIER = getattr(
+    django_settings,
+    "{}_DISK_QUOTA_PER_IDENTIFIER".format(appConfig.name.upper()),
+    None,
+)
+"""
+Maximum number of bytes stored by the jobs of a class sharing the same non-empty identifier, see
+`AJob.check_disk_quota`, None for no limit.
+"""
+
+SLUG_NODE_LEASE = getattr(
+    django_settings, "{}_SLUG_NODE_LEASE".format(appConfig.name.upper()), 3600
+)
+"""
+Lifetime of the node leased by each process to generate default slugs, see `fields.SlugSequence`, in seconds. The
+lease is renewed as slugs are generated.
+"""
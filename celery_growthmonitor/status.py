@@ -0,0 +1,86 @@
+"""
+Status of the jobs, served from the state cache so that polling clients do not hit the database.
+
+The cached status of a job is invalidated whenever the job is updated, once the transaction is committed. Waiting for
+a change of a job is then a matter of checking the cache until its status is gone, see `statecache.StateCache`.
+"""
+import asyncio
+import time
+
+from . import settings
+from .models.statecache import FIELDS as STATUS_FIELDS  # noqa: F401
+from .models.statecache import state_cache
+
+
+def get_status(model, pk):
+    """
+    Status of a job, from the state cache if available, from the database otherwise, see `AJob.get_cached_state`.
+
+    Parameters
+    ----------
+    model : type
+        Concrete subclass of AJob
+    pk
+        Primary key of the job
+
+    Returns
+    -------
+    dict or None
+        Values of ``STATUS_FIELDS``, None if the job does not exist
+
+    """
+    return state_cache.get(model, pk)
+
+
+def wait_for_change(model, pk, version, timeout):
+    """
+    Wait until the version of a job differs from `version`, at most `timeout` seconds.
+
+    The database is only queried once the cached status has been invalidated, see `get_status`.
+
+    Parameters
+    ----------
+    model : type
+        Concrete subclass of AJob
+    pk
+        Primary key of the job
+    version : int
+        Version of the job known by the client
+    timeout : float
+        In seconds
+
+    Returns
+    -------
+    dict or None
+        Latest status of the job, None if the job does not exist
+
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        status = get_status(model, pk)
+        if status is None or status["version"] != version:
+            return status
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return status
+        time.sleep(min(settings.LONGPOLL_INTERVAL, remaining))
+
+
+async def await_change(model, pk, version, timeout):
+    """
+    Asynchronous counterpart of `wait_for_change`, which does not hold a thread while waiting.
+
+    Requires `asgiref`, installed along with Django >= 3.0.
+    """
+    from asgiref.sync import sync_to_async
+
+    aget_status = sync_to_async(get_status)
+    deadline = time.monotonic() + timeout
+    while True:
+        status = await aget_status(model, pk)
+        if status is None or status["version"] != version:
+            return status
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return status
+        await asyncio.sleep(min(settings.LONGPOLL_INTERVAL, remaining))
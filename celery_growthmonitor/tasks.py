@@ -1,11 +1,18 @@
 from __future__ import absolute_import, unicode_literals
 
+import logging
+import uuid
 from collections import namedtuple
+from contextlib import contextmanager
 
-from celery import shared_task
+from celery import Task, shared_task
 
+from . import settings
+from .models.job import AJob, deferred_file_removal
 from .models.jobholder import JobHolder
 
+logger = logging.getLogger(__name__)
+
 ReturnTuple = namedtuple("ReturnTuple", ["job_holder", "results"])
 
 
@@ -13,6 +20,112 @@ def _compat_return(job_holder: JobHolder, *args):
     return ReturnTuple(job_holder, args)
 
 
+@contextmanager
+def _lease(key, timeout):
+    """
+    Hold a lock in the cache for at most `timeout` seconds.
+
+    Yields
+    ------
+    bool
+        Whether the lock has been acquired
+
+    """
+    from django.core.cache import caches
+
+    cache = caches[settings.CACHE]
+    token = uuid.uuid4().hex
+    acquired = cache.add(key, token, timeout)
+    try:
+        yield acquired
+    finally:
+        if acquired and cache.get(key) == token:
+            cache.delete(key)
+
+
+def _operation_key(operation, counter):
+    return "{}:operation:{}:{}".format(__name__, operation, counter)
+
+
+OPERATION_COUNTERS = ("total", "done", "failed")
+
+
+def start_operation(total):
+    """
+    Track the progress of a background operation in the cache, see `get_operation`.
+
+    Parameters
+    ----------
+    total : int
+        Number of items to process
+
+    Returns
+    -------
+    str
+        Identifier of the operation
+
+    """
+    from django.core.cache import caches
+
+    operation = uuid.uuid4().hex
+    caches[settings.CACHE].set_many(
+        {
+            _operation_key(operation, counter): total if counter == "total" else 0
+            for counter in OPERATION_COUNTERS
+        },
+        settings.OPERATION_TIMEOUT,
+    )
+    return operation
+
+
+def get_operation(operation):
+    """
+    Parameters
+    ----------
+    operation : str
+
+    Returns
+    -------
+    dict or None
+        Number of ``total``, ``done`` and ``failed`` items, None if the operation is unknown or expired
+
+    """
+    from django.core.cache import caches
+
+    keys = {
+        _operation_key(operation, counter): counter for counter in OPERATION_COUNTERS
+    }
+    values = caches[settings.CACHE].get_many(keys)
+    if len(values) < len(keys):
+        return None
+    return {keys[key]: value for key, value in values.items()}
+
+
+def _advance_operation(operation, done, failed=0):
+    from django.core.cache import caches
+
+    cache = caches[settings.CACHE]
+    for counter, value in (("done", done), ("failed", failed)):
+        if value:
+            try:
+                cache.incr(_operation_key(operation, counter), value)
+            except ValueError:
+                logger.warning("Progress of operation %s has expired", operation)
+
+
+def _split_results(previous_task_results, *args):
+    if isinstance(previous_task_results, ReturnTuple):
+        return _compat_return(
+            previous_task_results.job_holder, *(previous_task_results.results + args)
+        )
+    elif isinstance(previous_task_results, (tuple, list)):
+        # Tuples are received as lists with some serializers, e.g. JSON
+        return _compat_return(
+            previous_task_results[0], *(tuple(previous_task_results[1:]) + args)
+        )
+    return _compat_return(previous_task_results, *args)
+
+
 def extract_job_holder(previous_task_results, *args):
     """
 
@@ -29,17 +142,8 @@ def extract_job_holder(previous_task_results, *args):
         results : tuple
 
     """
-    if isinstance(previous_task_results, ReturnTuple):
-        return _compat_return(
-            previous_task_results.job_holder.post_serialization(),
-            *(previous_task_results.results + args)
-        )
-    elif isinstance(previous_task_results, tuple):
-        return _compat_return(
-            previous_task_results[0].post_serialization(),
-            *(previous_task_results[1:] + args)
-        )
-    return _compat_return(previous_task_results.post_serialization(), *args)
+    job_holder, results = _split_results(previous_task_results, *args)
+    return _compat_return(job_holder.post_serialization(), *results)
 
 
 # ==================================================
@@ -87,6 +191,106 @@ def stop(job_holder, *args):
     return _compat_return(job_holder.pre_serialization(), *args)
 
 
+@shared_task
+def merge(parallel_task_results):
+    """
+    Join the results of tasks run in parallel on the same job, see `canvas.parallel`.
+
+    Parameters
+    ----------
+    parallel_task_results : list
+        Results of each task, as JobHolder or tuple
+
+    Returns
+    -------
+    ReturnTuple
+        job_holder : JobHolder
+        results : tuple
+            Results of each task, as tuple, in the order of the tasks
+
+    """
+    branches = [_split_results(results) for results in parallel_task_results]
+    return _compat_return(
+        branches[0].job_holder, *(branch.results for branch in branches)
+    )
+
+
+# ==================================================
+#   INLINE MONITORING
+# ==================================================
+
+
+LIFECYCLE_HEADER = "growthmonitor"
+
+
+class MonitoredTask(Task):
+    """
+    Base class for tasks monitoring their job inline, without dedicated tasks in the chain.
+
+    The job is started before running the task marked with ``start`` in the ``LIFECYCLE_HEADER`` header, and stopped
+    once the task marked with ``stop`` returned, before its result is stored, see `canvas.chain_inline`. On failure,
+    the job is marked as failed and stopped, as Celery does not run the remaining tasks of the chain.
+
+    The first argument of the task is expected to be the results of the previous task, as for any task of the chain.
+    """
+
+    def _lifecycle(self):
+        headers = self.request.headers or {}
+        # The worker merges custom headers into the request, eager runs keep them apart
+        lifecycle = headers.get(LIFECYCLE_HEADER) or getattr(
+            self.request, LIFECYCLE_HEADER, None
+        )
+        return lifecycle or ()
+
+    @staticmethod
+    def _find_job_holder(*candidates):
+        for results in candidates:
+            job_holder = _split_results(results).job_holder
+            if isinstance(job_holder, JobHolder):
+                return job_holder
+        return None
+
+    def __call__(self, *args, **kwargs):
+        # Neither before_start (Celery >= 5.2) nor on_success, called once the result is stored, fit the lifecycle
+        lifecycle = self._lifecycle()
+        if "start" in lifecycle:
+            job_holder = self._find_job_holder(*args[:1])
+            if job_holder is not None:
+                job_holder.get_job().start()
+        retval = super().__call__(*args, **kwargs)
+        if "stop" in lifecycle:
+            job_holder = self._find_job_holder(retval, *args[:1])
+            if job_holder is not None:
+                self._stop(job_holder.get_job())
+        return retval
+
+    @staticmethod
+    def _stop(job):
+        job.stop()
+        if settings.PURGE_IN_CHAIN and settings.TTL.seconds > 0:
+            report = job.__class__.purge_expired()
+            logger.info(
+                "Purged %d %s, freeing %d bytes",
+                report.rows,
+                job.__class__.__name__,
+                report.bytes,
+            )
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        job_holder = self._find_job_holder(*args[:1])
+        if job_holder is not None:
+            job_holder.get_job().failed(self, exc)
+
+
+def monitored_task(*args, **options):
+    """
+    Decorator declaring a shared task based on `MonitoredTask`.
+
+    Accepts the same arguments as ``celery.shared_task``.
+    """
+    return shared_task(*args, base=MonitoredTask, **options)
+
+
 # ==================================================
 #   MAINTENANCE TASKS
 # ==================================================
@@ -95,6 +299,7 @@ def stop(job_holder, *args):
 @shared_task
 def remove_old_jobs(job_holder, *args):
     """
+    Remove the jobs of the same class as the one held, whose closure is over.
 
     Parameters
     ----------
@@ -103,12 +308,118 @@ def remove_old_jobs(job_holder, *args):
 
     Returns
     -------
+    ReturnTuple
 
     """
     job_holder, args = extract_job_holder(job_holder, *args)
-    from django.utils.timezone import now
-
-    candidates = job_holder.job.__class__.objects.filter(closure__lt=now())
-    for candidate in candidates:
-        candidate.delete()
+    job_class = job_holder.job.__class__
+    report = job_class.purge_expired()
+    logger.info(
+        "Purged %d %s, freeing %d bytes", report.rows, job_class.__name__, report.bytes
+    )
     return _compat_return(job_holder.pre_serialization(), *args)
+
+
+@shared_task
+def reap_old_jobs():
+    """
+    Remove the jobs of every class whose closure is over. Meant to be scheduled with Celery beat.
+
+    Only one sweep runs at a time, concurrent calls return immediately.
+
+    Returns
+    -------
+    dict or None
+        Rows and bytes freed per job class label, None if another sweep is running
+
+    """
+    from django.apps import apps
+
+    with _lease("{}:reaper".format(__name__), settings.REAPER_LEASE) as acquired:
+        if not acquired:
+            logger.debug("Another sweep is running, skipping")
+            return None
+        reports = {}
+        for model in apps.get_models():
+            if issubclass(model, AJob):
+                report = model.purge_expired()
+                logger.info(
+                    "Purged %d %s, freeing %d bytes",
+                    report.rows,
+                    model.__name__,
+                    report.bytes,
+                )
+                reports[model._meta.label] = tuple(report)
+        return reports
+
+
+# ==================================================
+#   ADMIN TASKS
+# ==================================================
+
+
+@shared_task
+def delete_jobs(job_label, pks, operation=None):
+    """
+    Delete jobs along with their files, see `admin.AJobAdmin`.
+
+    Files are removed in a single pass, once all jobs have been deleted.
+
+    Parameters
+    ----------
+    job_label : str
+        Label of the job model, ``app_label.ClassName``
+    pks : list
+        Primary keys of the jobs
+    operation : str
+        Identifier of the operation to report progress to, see `start_operation`
+
+    Returns
+    -------
+    int
+        Number of deleted jobs
+
+    """
+    from django.apps import apps
+
+    model = apps.get_model(job_label)
+    with deferred_file_removal():
+        _, deleted = model.objects.filter(pk__in=pks).delete()
+    if operation:
+        _advance_operation(operation, len(pks))
+    return deleted.get(model._meta.label, 0)
+
+
+@shared_task
+def rerun_jobs(job_label, pks, operation=None):
+    """
+    Run jobs again, see `AJob.rerun`. Jobs not completed are skipped and reported as failed.
+
+    Parameters
+    ----------
+    job_label : str
+        Label of the job model, ``app_label.ClassName``
+    pks : list
+        Primary keys of the jobs
+    operation : str
+        Identifier of the operation to report progress to, see `start_operation`
+
+    Returns
+    -------
+    int
+        Number of jobs run again
+
+    """
+    from django.apps import apps
+
+    model = apps.get_model(job_label)
+    done = 0
+    for job in model.objects.filter(pk__in=pks, state=AJob.EState.COMPLETED):
+        try:
+            if job.rerun() is not None:
+                done += 1
+        except Exception:
+            logger.exception("Could not run %s again", job)
+    if operation:
+        _advance_operation(operation, done, len(pks) - done)
+    return done
@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+from ..admin import AJobAdmin, HasJobAdminMixin
+from . import models
+
+site = admin.AdminSite()
+
+
+@admin.register(models.TestJob, site=site)
+class TestJobAdmin(AJobAdmin):
+    pass
+
+
+@admin.register(models.TestFile, site=site)
+class TestFileAdmin(HasJobAdminMixin, admin.ModelAdmin):
+    list_display = HasJobAdminMixin.list_display + ("job_link",)
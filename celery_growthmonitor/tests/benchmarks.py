@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the overhead of monitoring jobs, against eager Celery and SQLite.
+
+Run with ``python -m celery_growthmonitor.tests.benchmarks``, results are written in JSON.
+"""
+
+import argparse
+import json
+import os
+import pickle
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "celery_growthmonitor.tests.settings")
+
+CHAIN_LENGTHS = (0, 1, 5, 10)
+ADMIN_ROWS = 100000
+
+
+def _summary(durations):
+    """
+    Parameters
+    ----------
+    durations : list of float
+        In seconds
+
+    Returns
+    -------
+    dict
+        Mean, median and maximum, in milliseconds
+
+    """
+    return {
+        "count": len(durations),
+        "mean_ms": statistics.mean(durations) * 1000 if durations else None,
+        "median_ms": statistics.median(durations) * 1000 if durations else None,
+        "max_ms": max(durations) * 1000 if durations else None,
+    }
+
+
+@contextmanager
+def _hop_timer():
+    """
+    Measure the latency of each task run, per task name.
+    """
+    from celery import signals
+
+    started = {}
+    hops = defaultdict(list)
+
+    def prerun(task_id=None, **kwargs):
+        started[task_id] = time.perf_counter()
+
+    def postrun(task_id=None, task=None, **kwargs):
+        hops[task.name].append(time.perf_counter() - started.pop(task_id))
+
+    signals.task_prerun.connect(prerun, weak=False)
+    signals.task_postrun.connect(postrun, weak=False)
+    try:
+        yield hops
+    finally:
+        signals.task_prerun.disconnect(prerun)
+        signals.task_postrun.disconnect(postrun)
+
+
+def _new_job(with_files):
+    from django.core.files.base import ContentFile
+
+    from . import models
+
+    if with_files:
+        return models.TestJobWithRequiredFile(
+            sample=ContentFile("SAMPLE DUMMY CONTENT", "sample.txt"),
+            other=ContentFile("OTHER DUMMY CONTENT", "other.txt"),
+        )
+    return models.TestJob()
+
+
+def bench_creation(jobs, with_files=False):
+    """
+    Creation of jobs through ``AJob.save()``.
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    durations = []
+    with CaptureQueriesContext(connection) as queries:
+        for _ in range(jobs):
+            job = _new_job(with_files)
+            start = time.perf_counter()
+            job.save()
+            durations.append(time.perf_counter() - start)
+    total = sum(durations)
+    return {
+        "jobs": jobs,
+        "jobs_per_sec": jobs / total if total else None,
+        "queries_per_job": len(queries) / jobs,
+        "latency": _summary(durations),
+    }
+
+
+def bench_serialization(jobs):
+    """
+    Round trip of a `JobHolder` through pickle, as done at every hop of a chain.
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from ..models import JobHolder
+
+    job = _new_job(False)
+    job.save()
+    holder = JobHolder(job)
+    durations = []
+    with CaptureQueriesContext(connection) as queries:
+        for _ in range(jobs):
+            start = time.perf_counter()
+            payload = pickle.dumps(holder.pre_serialization())
+            holder = pickle.loads(payload).post_serialization()
+            durations.append(time.perf_counter() - start)
+    return {
+        "round_trips": jobs,
+        "payload_bytes": len(payload),
+        "queries_per_round_trip": len(queries) / jobs,
+        "latency": _summary(durations),
+    }
+
+
+def bench_chain(jobs, length, with_files=False):
+    """
+    Chains of `length` tasks doing nothing but loading the job, wrapped by `canvas.chain`.
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from ..canvas import chain
+    from ..models import JobHolder
+    from . import tasks
+
+    holders = []
+    for _ in range(jobs):
+        job = _new_job(with_files)
+        job.save()
+        holders.append(JobHolder(job))
+    durations = []
+    with _hop_timer() as hops, CaptureQueriesContext(connection) as queries:
+        for holder in holders:
+            workflow = chain(holder, *(tasks.identity_task.s() for _ in range(length)))
+            start = time.perf_counter()
+            workflow.apply_async()
+            durations.append(time.perf_counter() - start)
+    total = sum(durations)
+    return {
+        "jobs": jobs,
+        "chain_length": length,
+        "required_files": with_files,
+        "jobs_per_sec": jobs / total if total else None,
+        "queries_per_job": len(queries) / jobs,
+        "latency": _summary(durations),
+        "hops": {name: _summary(values) for name, values in sorted(hops.items())},
+    }
+
+
+def bench_admin(rows, per_page=100):
+    """
+    Change list of `AJobAdmin` over a table of `rows` jobs, against a plain paginator loading all columns.
+    """
+    from django.contrib.admin import AdminSite
+    from django.core.paginator import Paginator
+    from django.db import connection
+    from django.test import RequestFactory
+    from django.test.utils import CaptureQueriesContext
+
+    from ..admin import AJobAdmin
+    from . import models
+
+    models.TestJob.objects.bulk_create(
+        (models.TestJob(identifier="bench") for _ in range(rows)), batch_size=1000
+    )
+    request = RequestFactory().get("/")
+    model_admin = AJobAdmin(models.TestJob, AdminSite())
+    list_display = model_admin.get_list_display(request)
+    queryset = model_admin.get_queryset(request).order_by("-pk")
+    results = {"rows": rows}
+    for name, paginator in (
+        ("plain", Paginator(queryset, per_page)),
+        ("admin", model_admin.get_paginator(request, queryset, per_page)),
+    ):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            count = paginator.count
+            counted = time.perf_counter()
+            for job in paginator.page(1).object_list:
+                for field in list_display:
+                    getattr(job, field)
+            listed = time.perf_counter()
+        results[name] = {
+            "count": count,
+            "count_ms": (counted - start) * 1000,
+            "page_ms": (listed - counted) * 1000,
+            "queries": len(queries),
+        }
+    return results
+
+
+def run(jobs=100, lengths=CHAIN_LENGTHS, admin_rows=ADMIN_ROWS):
+    """
+    Run all benchmarks. The database must have been set up.
+
+    Jobs are given a TTL of one hour, so that chains include the purge of expired jobs.
+
+    Parameters
+    ----------
+    jobs : int
+        Number of jobs per benchmark
+    lengths : iterable of int
+        Lengths of the chains
+    admin_rows : int
+        Number of jobs in the table listed by the admin, seeded last
+
+    Returns
+    -------
+    dict
+        Results per benchmark name
+
+    """
+    from datetime import timedelta
+    from unittest import mock
+
+    from django.test.utils import override_settings
+
+    from .. import settings
+
+    media_root = tempfile.mkdtemp()
+    try:
+        with override_settings(MEDIA_ROOT=media_root), mock.patch.object(
+            settings, "TTL", timedelta(hours=1)
+        ):
+            results = {
+                "creation[files=False]": bench_creation(jobs),
+                "creation[files=True]": bench_creation(jobs, with_files=True),
+                "serialization": bench_serialization(jobs),
+            }
+            for length in lengths:
+                for with_files in (False, True):
+                    name = "chain[length={},files={}]".format(length, with_files)
+                    results[name] = bench_chain(jobs, length, with_files)
+            results["admin"] = bench_admin(admin_rows)
+    finally:
+        shutil.rmtree(media_root)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--jobs", type=int, default=100, help="number of jobs per benchmark"
+    )
+    parser.add_argument(
+        "--lengths",
+        type=int,
+        nargs="+",
+        default=CHAIN_LENGTHS,
+        help="lengths of the benchmarked chains",
+    )
+    parser.add_argument(
+        "--admin-rows",
+        type=int,
+        default=ADMIN_ROWS,
+        help="number of jobs in the table listed by the admin",
+    )
+    parser.add_argument(
+        "--output",
+        type=argparse.FileType("w"),
+        default=sys.stdout,
+        help="file to write the JSON results to",
+    )
+    args = parser.parse_args(argv)
+
+    django.setup()
+    import celery
+
+    from django.test.runner import DiscoverRunner
+
+    from celery_growthmonitor import __version__
+
+    runner = DiscoverRunner(verbosity=0)
+    runner.setup_test_environment()
+    old_config = runner.setup_databases()
+    try:
+        results = run(jobs=args.jobs, lengths=args.lengths, admin_rows=args.admin_rows)
+    finally:
+        runner.teardown_databases(old_config)
+        runner.teardown_test_environment()
+    json.dump(
+        {
+            "version": __version__,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "celery": celery.__version__,
+            "timestamp": time.time(),
+            "results": results,
+        },
+        args.output,
+        indent=2,
+    )
+    args.output.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,24 @@ from distutils.version import StrictVersion
 from django import get_version as django_version
 from django.db import models
 
-from celery_growthmonitor.models import AJob, ADataFile, job_root, job_data, job_results
+from celery_growthmonitor.models import (
+    AJob,
+    ADataFile,
+    ATaskRun,
+    job_root,
+    job_data,
+    job_results,
+)
 
 
 class TestJob(AJob):
-    pass
+    def get_workflow(self):
+        from celery_growthmonitor.canvas import chain
+        from celery_growthmonitor.models import JobHolder
+
+        from .tasks import identity_task
+
+        return chain(JobHolder(self), identity_task.s())
 
 
 class TestJobTwo(AJob):
@@ -71,6 +84,10 @@ class TestFile(ACompatDataFile):
         data = models.FileField(upload_to=ADataFile.upload_to_data, max_length=256)
 
 
+class TestTaskRun(ATaskRun):
+    job = models.ForeignKey(TestJob, on_delete=models.CASCADE)
+
+
 # Not supported anymore
 # class MyDataStrTestFile(ACompatDataFile):
 #     upload_to_data = 'my_data_str'
@@ -28,6 +28,8 @@ DATABASES = {
     },
 }
 
+ROOT_URLCONF = "celery_growthmonitor.tests.urls"
+
 MIDDLEWARE = [
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -69,3 +71,5 @@ CELERY_RESULT_SERIALIZER = "pickle"
 # CELERY-GROWTHMONITOR
 # ------------------------------------------------------------------------------
 CELERY_GROWTHMONITOR_APP_ROOT = "c_gm"
+# Written right away, without timers flushing from other threads, unless patched by the tests of the buffers
+CELERY_GROWTHMONITOR_BUFFER_INTERVAL = 0
@@ -3,7 +3,7 @@ from __future__ import absolute_import, unicode_literals
 from celery import shared_task
 
 from ..models.jobholder import JobHolder
-from ..tasks import ReturnTuple
+from ..tasks import ReturnTuple, monitored_task
 
 
 @shared_task
@@ -29,3 +29,19 @@ def failing_task(job_holder: JobHolder):
     job_holder.post_serialization()
     job_holder.job.failed(failing_task, RuntimeError("Please do not disturb this task"))
     return job_holder.pre_serialization()
+
+
+@shared_task
+def raising_task(job_holder: JobHolder):
+    raise RuntimeError("Please do not disturb this task")
+
+
+@monitored_task
+def monitored_identity_task(job_holder: JobHolder):
+    job_holder.get_job()
+    return job_holder.pre_serialization()
+
+
+@monitored_task
+def monitored_raising_task(job_holder: JobHolder):
+    raise RuntimeError("Please do not disturb this task")
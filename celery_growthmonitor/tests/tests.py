@@ -2,7 +2,9 @@
 
 import os
 import warnings
+from unittest import skipIf
 
+import django
 from django.core.files.base import ContentFile
 from django.test import TestCase
 
@@ -15,6 +17,20 @@ from ..canvas import chain
 warnings.simplefilter("always")
 
 
+def on_commit_run():
+    """
+    Run the transaction hooks immediately, as test cases never commit. Unlike ``TestCase.captureOnCommitCallbacks``,
+    also available before Django 3.2.
+    """
+    from unittest import mock
+
+    from django.db import transaction
+
+    return mock.patch.object(
+        transaction, "on_commit", side_effect=lambda func, using=None: func()
+    )
+
+
 class JobTestCase(TestCase):
     def setUp(self):
         self.app_root = os.path.join(
@@ -185,6 +201,365 @@ class JobTestCase(TestCase):
         )
         self.assertTrue(os.path.exists(self.build_path("testjobwithrequiredfile")))
 
+    def test_move_user_required_file(self):
+        import errno
+        from unittest import mock
+
+        for side_effect in (os.rename, OSError(errno.EXDEV, "Cross-device link")):
+            with mock.patch("os.rename", side_effect=side_effect) as rename:
+                test_job = models.TestJobWithRequiredFile(
+                    sample=ContentFile("SAMPLE DUMMY CONTENT", "sample.txt"),
+                    other=ContentFile("OTHER DUMMY CONTENT", "other.txt"),
+                )
+                test_job.save()
+            self.assertEqual(rename.call_count, 2)
+            path = self.build_path(
+                "testjobwithrequiredfile", str(test_job.pk), "data", "sample.txt"
+            )
+            self.assertEqual(test_job.sample.path, path)
+            with open(path) as sample:
+                self.assertEqual(sample.read(), "SAMPLE DUMMY CONTENT")
+            self.assertEqual(
+                os.listdir(self.build_path("testjobwithrequiredfile", "tmp")), []
+            )
+
+    def test_single_write_creation(self):
+        from datetime import timedelta
+        from unittest import mock
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with mock.patch.object(settings, "TTL", timedelta(seconds=60)):
+            test_job = models.TestJob()
+            with CaptureQueriesContext(connection) as queries:
+                test_job.save()
+            writes = [q["sql"] for q in queries if not q["sql"].startswith("SELECT")]
+            self.assertEqual(len(writes), 1)
+            self.assertTrue(writes[0].startswith("INSERT"))
+            test_job.refresh_from_db()
+            self.assertAlmostEqual(
+                test_job.closure,
+                test_job.timestamp + settings.TTL,
+                delta=timedelta(seconds=1),
+            )
+        # Known primary key, files are uploaded to their final location
+        test_job = models.TestJobWithRequiredFile(
+            pk=42,
+            sample=ContentFile("SAMPLE DUMMY CONTENT", "sample.txt"),
+            other=ContentFile("OTHER DUMMY CONTENT", "other.txt"),
+        )
+        with CaptureQueriesContext(connection) as queries:
+            test_job.save()
+        writes = [q["sql"] for q in queries if not q["sql"].startswith("SELECT")]
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(
+            os.path.isfile(
+                self.build_path("testjobwithrequiredfile", "42", "data", "sample.txt")
+            )
+        )
+        self.assertTrue(
+            os.path.isdir(self.build_path("testjobwithrequiredfile", "42", "results"))
+        )
+
+    def test_lazy_results_folder(self):
+        from unittest import mock
+
+        with mock.patch.object(settings, "LAZY_RESULTS_FOLDER", True):
+            test_job = models.TestJob()
+            test_job.save()
+            expected_path = self.build_path("testjob", str(test_job.pk), "results")
+            self.assertFalse(os.path.exists(expected_path))
+            test_job.start()
+            self.assertTrue(os.path.isdir(expected_path))
+            # Jobs never started have no folder to remove
+            test_job = models.TestJob()
+            test_job.save()
+            pk = test_job.pk
+            test_job.delete()
+            self.assertFalse(models.TestJob.objects.filter(pk=pk).exists())
+
+    def test_preset_primary_key(self):
+        from django.utils import timezone
+
+        # Created with a single INSERT when asked to
+        test_job = models.TestJob(pk=100)
+        with self.assertNumQueries(1):
+            test_job.save(force_insert=True)
+        self.assertTrue(os.path.isdir(self.build_path("testjob", "100", "results")))
+        # Created, or overwritten
+        models.TestJob(pk=101).save()
+        self.assertTrue(os.path.isdir(self.build_path("testjob", "101", "results")))
+        version = models.TestJob.objects.get(pk=100).version
+        models.TestJob(
+            pk=100, timestamp=timezone.now(), identifier="overwritten"
+        ).save()
+        test_job = models.TestJob.objects.get(pk=100)
+        self.assertEqual(test_job.identifier, "overwritten")
+        self.assertEqual(test_job.version, version + 1)
+
+    def test_slug(self):
+        slugs = set()
+        for _ in range(50):
+            test_job = models.TestJob(identifier="Burst")
+            with self.assertNumQueries(1):
+                test_job.save()
+            self.assertRegex(test_job.slug, r"^burst\d{10}-[0-9a-z]{9}$")
+            slugs.add(test_job.slug)
+        self.assertEqual(len(slugs), 50)
+        # Explicit slugs are still made unique
+        models.TestJob(slug="mine").save()
+        test_job = models.TestJob(slug="mine")
+        test_job.save()
+        self.assertEqual(test_job.slug, "mine-2")
+
+    def test_bulk_create_jobs(self):
+        from unittest import mock
+
+        jobs = [models.TestJob(identifier="batch{}".format(i)) for i in range(20)]
+        with self.assertNumQueries(2):
+            holders = models.TestJob.bulk_create_jobs(jobs, batch_size=50)
+        self.assertEqual(models.TestJob.objects.count(), 20)
+        for job, holder in zip(jobs, holders):
+            self.assertIs(holder.job, job)
+            self.assertEqual(holder._job_pk, job.pk)
+            self.assertEqual(models.TestJob.objects.get(pk=job.pk).slug, job.slug)
+            self.assertTrue(
+                os.path.isdir(self.build_path("testjob", str(job.pk), "results"))
+            )
+        result = chain(holders[0]).apply_async(debug=True)
+        self.assertIs(result.result.job_holder.get_job().state, AJob.EState.COMPLETED)
+        #
+        jobs = [
+            models.TestJobWithRequiredFile(
+                sample=ContentFile("SAMPLE {}".format(i), "sample.txt"),
+                other=ContentFile("OTHER {}".format(i), "other.txt"),
+            )
+            for i in range(3)
+        ]
+        models.TestJobWithRequiredFile.bulk_create_jobs(jobs)
+        for i, job in enumerate(jobs):
+            job.refresh_from_db()
+            path = self.build_path(
+                "testjobwithrequiredfile", str(job.pk), "data", "sample.txt"
+            )
+            self.assertEqual(job.sample.path, path)
+            with open(path) as sample:
+                self.assertEqual(sample.read(), "SAMPLE {}".format(i))
+        # Temporary folders are distinct within a batch
+        jobs = [
+            models.TestJobWithRequiredFile(
+                sample=ContentFile("SAMPLE", "sample.txt"),
+                other=ContentFile("OTHER", "other.txt"),
+            )
+            for _ in range(2)
+        ]
+        with mock.patch("random.randrange", return_value=10 ** 6):
+            models.TestJobWithRequiredFile.bulk_create_jobs(jobs)
+        for job in jobs:
+            job.refresh_from_db()
+            self.assertTrue(os.path.isfile(job.sample.path))
+
+    def test_purge_expired(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        jobs = [models.TestJob() for _ in range(4)]
+        for job in jobs:
+            job.save()
+        models.TestFile(
+            job=jobs[0], data=ContentFile("DUMMY CONTENT", "foobar.txt")
+        ).save()
+        models.TestJob.objects.filter(pk__in=[job.pk for job in jobs[:3]]).update(
+            closure=timezone.now() - timedelta(seconds=1)
+        )
+        report = models.TestJob.purge_expired(batch_size=2)
+        self.assertEqual(report.rows, 3)
+        self.assertEqual(report.bytes, len("DUMMY CONTENT"))
+        self.assertEqual(list(models.TestJob.objects.all()), [jobs[3]])
+        self.assertFalse(models.TestFile.objects.exists())
+        for job in jobs[:3]:
+            self.assertFalse(os.path.exists(self.build_path("testjob", str(job.pk))))
+        self.assertTrue(os.path.exists(self.build_path("testjob", str(jobs[3].pk))))
+        self.assertEqual(models.TestJob.purge_expired(), (0, 0))
+
+    def test_purge_expired_failure(self):
+        from datetime import timedelta
+        from unittest import mock
+
+        from django.db.models.query import QuerySet
+        from django.utils import timezone
+
+        jobs = [models.TestJob() for _ in range(2)]
+        for job in jobs:
+            job.save()
+        models.TestJob.objects.update(closure=timezone.now() - timedelta(seconds=1))
+        calls = []
+
+        def delete(queryset):
+            calls.append(queryset)
+            if len(calls) > 1:
+                raise RuntimeError("Second batch")
+            return original(queryset)
+
+        original = QuerySet.delete
+        with mock.patch.object(QuerySet, "delete", autospec=True, side_effect=delete):
+            with self.assertRaises(RuntimeError):
+                models.TestJob.purge_expired(batch_size=1)
+        # Files of the jobs deleted before the failure are removed anyway
+        self.assertEqual(list(models.TestJob.objects.all()), [jobs[1]])
+        self.assertFalse(os.path.exists(self.build_path("testjob", str(jobs[0].pk))))
+        self.assertTrue(os.path.exists(self.build_path("testjob", str(jobs[1].pk))))
+
+    def test_disk_usage(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        sample, other = "SAMPLE DUMMY CONTENT", "OTHER DUMMY CONTENT"
+        # Moved from the temporary folder
+        test_job = models.TestJobWithRequiredFile(
+            sample=ContentFile(sample, "sample.txt"),
+            other=ContentFile(other, "other.txt"),
+        )
+        test_job.save()
+        test_job.refresh_from_db()
+        self.assertEqual(test_job.disk_usage, len(sample) + len(other))
+        # Uploaded to their final location
+        test_job = models.TestJobWithRequiredFile(
+            pk=42,
+            sample=ContentFile(sample, "sample.txt"),
+            other=ContentFile(other, "other.txt"),
+        )
+        test_job.save()
+        test_job.refresh_from_db()
+        self.assertEqual(test_job.disk_usage, len(sample) + len(other))
+        # Bulk creation
+        jobs = [
+            models.TestJobWithRequiredFile(
+                sample=ContentFile(sample, "sample.txt"),
+                other=ContentFile(other, "other.txt"),
+            )
+        ]
+        models.TestJobWithRequiredFile.bulk_create_jobs(jobs)
+        jobs[0].refresh_from_db()
+        self.assertEqual(jobs[0].disk_usage, len(sample) + len(other))
+        # Data files and results
+        test_job = models.TestJob()
+        test_job.save()
+        data_file = models.TestFile(
+            job=test_job, data=ContentFile("DUMMY CONTENT", "foobar.txt")
+        )
+        data_file.save()
+        self.assertEqual(test_job.disk_usage, len("DUMMY CONTENT"))
+        path = test_job.save_result("out/result.txt", "RESULT")
+        with open(path) as result:
+            self.assertEqual(result.read(), "RESULT")
+        self.assertEqual(test_job.disk_usage, len("DUMMY CONTENT") + len("RESULT"))
+        test_job.save_result("out/result.txt", b"NEW")
+        self.assertEqual(test_job.disk_usage, len("DUMMY CONTENT") + len("NEW"))
+        data_file.delete()
+        test_job.refresh_from_db(fields=["disk_usage"])
+        self.assertEqual(test_job.disk_usage, len("NEW"))
+        self.assertEqual(
+            models.TestJobWithRequiredFile.get_disk_usage(),
+            3 * (len(sample) + len(other)),
+        )
+        # Not updated for jobs deleted along with their data files
+        for _ in range(2):
+            models.TestFile(
+                job=test_job, data=ContentFile("DUMMY CONTENT", "foobar.txt")
+            ).save()
+        with CaptureQueriesContext(connection) as queries:
+            test_job.delete()
+        self.assertFalse([q for q in queries if q["sql"].startswith("UPDATE")])
+        self.assertFalse(models.TestFile.objects.exists())
+
+    def test_disk_quota(self):
+        from unittest import mock
+
+        from ..models import DiskQuotaExceeded
+
+        with mock.patch.object(settings, "DISK_QUOTA_PER_IDENTIFIER", 10):
+            first = models.TestJob(identifier="first")
+            first.save()
+            first.save_result("result.txt", b"0123456789")
+            with self.assertRaises(DiskQuotaExceeded) as cm:
+                first.save_result("other.txt", b"0")
+            self.assertEqual(cm.exception.identifier, "first")
+            self.assertEqual(cm.exception.usage, 10)
+            self.assertFalse(
+                os.path.exists(
+                    self.build_path("testjob", str(first.pk), "results", "other.txt")
+                )
+            )
+            # Smaller results are always accepted
+            first.save_result("result.txt", b"01234")
+            # Other identifiers and jobs without identifier are not limited
+            second = models.TestJob(identifier="second")
+            second.save()
+            second.save_result("result.txt", b"0123456789")
+            anonymous = models.TestJob()
+            anonymous.save()
+            anonymous.save_result("result.txt", b"0123456789" * 2)
+            with self.assertRaises(DiskQuotaExceeded):
+                models.TestFile(
+                    job=second, data=ContentFile("DUMMY CONTENT", "foobar.txt")
+                ).save()
+            self.assertFalse(models.TestFile.objects.exists())
+        with mock.patch.object(settings, "DISK_QUOTA_PER_CLASS", 30):
+            self.assertEqual(models.TestJob.get_disk_usage(), 35)
+            self.assertEqual(models.TestJob.get_disk_usage("first"), 5)
+            # Already above the quota, no job can be created anymore
+            with self.assertRaises(DiskQuotaExceeded) as cm:
+                models.TestJob.bulk_create_jobs(
+                    [
+                        models.TestJob(identifier="third"),
+                        models.TestJob(identifier="third"),
+                    ]
+                )
+            self.assertIsNone(cm.exception.identifier)
+
+
+class SlugSequenceTestCase(TestCase):
+    def test_next(self):
+        from unittest import mock
+
+        from django.core.cache import caches
+
+        from ..models.fields import SlugSequence
+
+        caches[settings.CACHE].clear()
+        first, second = SlugSequence(), SlugSequence()
+        # Concurrent processes drawing the same node
+        with mock.patch("random.randrange", side_effect=[0, 0, 1]):
+            first.next()
+            second.next()
+        self.assertEqual(first.node, "0000")
+        self.assertEqual(second.node, "0001")
+        # Last microsecond of a minute
+        with mock.patch("time.time", return_value=59.9999995), mock.patch(
+            "random.randrange", return_value=2
+        ):
+            self.assertEqual(SlugSequence().next(), "7001010000-zq0an0002")
+
+
+class IndexesTestCase(TestCase):
+    def test_indexes(self):
+        from django.db import connection
+
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, models.TestJob._meta.db_table
+            )
+        indexes = [c["columns"] for c in constraints.values() if c["index"]]
+        for columns in (
+            ["state", "status"],
+            ["status", "closure"],
+            ["state", "started"],
+        ):
+            self.assertIn(columns, indexes)
+
 
 class TasksTestCase(TestCase):
     def setUp(self):
@@ -250,6 +625,313 @@ class TasksTestCase(TestCase):
         self.assertIs(result.result.results[0], True)
         self.assertEqual(result.result.results[1], 2)
 
+    def test_lifecycle_writes(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            self.job.start()
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"error"', queries[0]["sql"])
+        self.assertNotIn('"slug"', queries[0]["sql"])
+        with self.assertNumQueries(1):
+            self.job.stop()
+        with self.assertNumQueries(0):
+            self.job.stop()
+        job = models.TestJob()
+        job.save()
+        job.start()
+        with self.assertNumQueries(1):
+            job.failed(tasks.failing_task, RuntimeError())
+        job.refresh_from_db()
+        self.assertIs(job.state, AJob.EState.COMPLETED)
+        self.assertIs(job.status, AJob.EStatus.FAILURE)
+        self.assertIsNotNone(job.duration)
+        self.assertTrue(job.has_failed())
+
+    def test_transitions(self):
+        stale = models.TestJob.objects.get(pk=self.job.pk)
+        self.assertTrue(self.job.transition(AJob.EState.SUBMITTED))
+        self.assertFalse(self.job.transition(AJob.EState.SUBMITTED))
+        self.assertFalse(self.job.transition(AJob.EState.CREATED))
+        self.job.start()
+        self.job.stop()
+        # Another worker holding an outdated copy cannot run the job again
+        state, status, started = stale.start()
+        self.assertIs(state, AJob.EState.COMPLETED)
+        self.assertIs(status, AJob.EStatus.SUCCESS)
+        self.assertEqual(started, self.job.started)
+        self.assertIs(stale.progress(AJob.EState.RUNNING), AJob.EState.COMPLETED)
+        self.job.refresh_from_db()
+        self.assertIs(self.job.state, AJob.EState.COMPLETED)
+        # Nor fail it afterwards
+        stale = models.TestJob.objects.get(pk=self.job.pk)
+        stale.state = AJob.EState.RUNNING
+        stale.failed(tasks.failing_task, RuntimeError())
+        self.assertIs(stale.status, AJob.EStatus.SUCCESS)
+        self.job.refresh_from_db()
+        self.assertIs(self.job.status, AJob.EStatus.SUCCESS)
+
+    @skipIf(django.VERSION < (3, 1), "Asynchronous tests require Django >= 3.1")
+    async def test_async_lifecycle(self):
+        from asgiref.sync import sync_to_async
+
+        job_holder = JobHolder(self.job).pre_serialization()
+        job = await job_holder.aget_job()
+        self.assertEqual(job, self.job)
+        self.assertIs(await job_holder.aget_job(), job)
+        self.assertIs(await job.aprogress(AJob.EState.SUBMITTED), AJob.EState.CREATED)
+        state, status, started = await job.astart()
+        self.assertIs(state, AJob.EState.RUNNING)
+        self.assertIsNotNone(started)
+        # Not applied twice
+        stale = await sync_to_async(models.TestJob.objects.get)(pk=job.pk)
+        stale.state = AJob.EState.CREATED
+        await stale.astart()
+        self.assertIs(stale.state, AJob.EState.RUNNING)
+        self.assertEqual(stale.started, started)
+        state, status, duration = await job.astop()
+        self.assertIs(state, AJob.EState.COMPLETED)
+        self.assertIs(status, AJob.EStatus.SUCCESS)
+        self.assertIsNotNone(duration)
+        await sync_to_async(job.refresh_from_db)()
+        self.assertIs(job.state, AJob.EState.COMPLETED)
+        self.assertEqual(job.completion, 1.0)
+        self.assertEqual(await job.astop(), (state, status, duration))
+
+    def test_buffered_save(self):
+        from unittest import mock
+
+        from ..models.buffer import write_behind
+
+        self.job.start()
+        with mock.patch.multiple(write_behind, interval=60, size=2):
+            with self.assertNumQueries(0):
+                for i in range(100):
+                    self.job.identifier = "step{}".format(i)
+                    self.job.buffered_save(["identifier"])
+            # Flushed along with the completion
+            with self.assertNumQueries(1):
+                self.job.stop()
+            self.job.refresh_from_db()
+            self.assertEqual(self.job.identifier, "step99")
+            self.assertIs(self.job.state, AJob.EState.COMPLETED)
+            # Flushed when too many jobs are pending
+            other = models.TestJob()
+            other.save()
+            self.job.identifier = "first"
+            self.job.buffered_save(["identifier"])
+            other.identifier = "second"
+            with self.assertNumQueries(1):
+                other.buffered_save(["identifier"])
+            self.assertEqual(
+                set(models.TestJob.objects.values_list("identifier", flat=True)),
+                {"first", "second"},
+            )
+        # Flushed when too old
+        with mock.patch.multiple(write_behind, interval=0, size=100):
+            self.job.identifier = "third"
+            with self.assertNumQueries(1):
+                self.job.buffered_save(["identifier"])
+        # Flushed by a timer without further updates
+        with mock.patch.multiple(write_behind, interval=60, size=100), mock.patch(
+            "threading.Timer"
+        ) as timer:
+            self.job.identifier = "fourth"
+            self.job.buffered_save(["identifier"])
+            self.job.buffered_save(["identifier"])
+            timer.assert_called_once_with(60, write_behind._flush_on_timer)
+            self.assertTrue(timer.return_value.start.called)
+            write_behind._flush_on_timer()
+            self.assertTrue(timer.return_value.cancel.called)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.identifier, "fourth")
+        # Progress flushed after the completion is dropped, other fields are written
+        job = models.TestJob()
+        job.save()
+        job.start()
+        with mock.patch.multiple(write_behind, interval=60, size=100), mock.patch(
+            "threading.Timer"
+        ):
+            job.report_progress(0.5, message="Halfway")
+            job.identifier = "late"
+            job.buffered_save(["identifier"])
+            # Taken by the timer before the job is stopped
+            with mock.patch.object(write_behind, "pop", return_value={}):
+                job.stop()
+            version = models.TestJob.objects.get(pk=job.pk).version
+            self.assertEqual(write_behind.flush(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.completion, 1)
+        self.assertEqual(job.progress_message, "")
+        self.assertEqual(job.identifier, "late")
+        self.assertEqual(job.version, version + 1)
+
+    def test_report_progress(self):
+        from unittest import mock
+
+        from ..models.buffer import write_behind
+
+        self.job.start()
+        with mock.patch.multiple(write_behind, interval=0, size=1):
+            with mock.patch("time.monotonic", return_value=1000.0):
+                with self.assertNumQueries(1):
+                    self.assertTrue(self.job.report_progress(1, 100, "Loading"))
+                    for done in range(2, 50):
+                        self.assertFalse(self.job.report_progress(done, 100))
+            with mock.patch("time.monotonic", return_value=1010.0):
+                # Too small a change
+                self.assertFalse(self.job.report_progress(1.001, 100))
+                self.assertTrue(self.job.report_progress(47, 100))
+            self.job.refresh_from_db()
+            self.assertAlmostEqual(self.job.completion, 0.47)
+            self.assertEqual(self.job.progress_message, "Loading")
+            with mock.patch("time.monotonic", return_value=1010.0):
+                self.assertTrue(self.job.report_progress(1, message="Done"))
+        self.job.stop()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.completion, 1)
+        self.assertEqual(self.job.progress_message, "Done")
+
+    def test_task_runs(self):
+        from unittest import mock
+
+        from celery import signals as celery_signals
+
+        from ..models.taskrun import task_runs
+
+        with mock.patch.multiple(
+            task_runs, interval=60, size=100, _pending=[], _running={}, _timer=None
+        ), mock.patch("threading.Timer") as timer:
+            workflow = chain(self.holder, tasks.identity_task.s())
+            with self.assertNumQueries(0):
+                task_runs.started("dummy", tasks.identity_task, ())
+                task_runs.finished("dummy", "SUCCESS")
+            # Recording a hop adds no query to the one of the task loading its job
+            with self.assertNumQueries(1):
+                tasks.identity_task.apply(args=(self.holder.pre_serialization(),))
+            workflow.apply_async(debug=True)
+            tasks.raising_task.apply(args=(self.holder.pre_serialization(),))
+            self.assertFalse(models.TestTaskRun.objects.exists())
+            # A single timer flushes idle workers
+            timer.assert_called_once_with(60, task_runs._flush_on_timer)
+            self.assertTrue(timer.return_value.start.called)
+            with self.assertNumQueries(2):
+                task_runs._flush_on_timer()
+            self.assertTrue(timer.return_value.cancel.called)
+            self.assertEqual(task_runs._pending, [])
+        runs = models.TestTaskRun.objects.filter(job=self.job).order_by("started")
+        self.assertEqual(
+            [(run.task_name, run.outcome) for run in runs],
+            [
+                ("celery_growthmonitor.tests.tasks.identity_task", "SUCCESS"),
+                ("celery_growthmonitor.tasks.start", "SUCCESS"),
+                ("celery_growthmonitor.tests.tasks.identity_task", "SUCCESS"),
+                ("celery_growthmonitor.tasks.stop", "SUCCESS"),
+                ("celery_growthmonitor.tests.tasks.raising_task", "FAILURE"),
+            ],
+        )
+        for run in runs:
+            self.assertEqual(run.ended - run.started, run.runtime)
+        # Pending runs are written when the worker shuts down, e.g. with the solo pool
+        with mock.patch.multiple(
+            task_runs, interval=60, size=100, _pending=[], _running={}, _timer=None
+        ), mock.patch("threading.Timer"):
+            tasks.identity_task.apply(args=(self.holder.pre_serialization(),))
+            self.assertEqual(runs.all().count(), 5)
+            celery_signals.worker_shutdown.send(sender=None)
+            self.assertEqual(runs.all().count(), 6)
+        # Jobs without task run model are ignored
+        job = models.TestJobTwo()
+        job.save()
+        with mock.patch.multiple(task_runs, _pending=[], _running={}):
+            tasks.identity_task.apply(args=(JobHolder(job),))
+            self.assertEqual(task_runs.flush(), 0)
+
+    def test_parallel_tasks(self):
+        from ..canvas import chain_parallel, parallel
+
+        workflow = chain_parallel(
+            self.holder,
+            tasks.parametric_task.s(1),
+            tasks.parametric_task.s(2, 3),
+            tasks.constant_task.s(),
+        )
+        result = workflow.apply_async(debug=True)
+        self.assertEqual(result.state, "SUCCESS")
+        self.assertIsInstance(result.result.job_holder, JobHolder)
+        self.assertEqual(result.result.results, ((1,), (2, 3), (True,)))
+        job = result.result.job_holder.get_job()
+        self.assertIs(job.state, AJob.EState.COMPLETED)
+        self.assertIs(job.status, AJob.EStatus.SUCCESS)
+        # Mixed with sequential tasks
+        job = models.TestJob()
+        job.save()
+        workflow = chain(
+            JobHolder(job),
+            tasks.identity_task.s(),
+            *parallel(tasks.identity_task.s(), tasks.constant_task.s())
+        )
+        result = workflow.apply_async(debug=True)
+        self.assertEqual(result.result.results, ((), (True,)))
+        # Nothing to merge
+        self.assertRaises(ValueError, parallel)
+        self.assertRaises(ValueError, chain_parallel, JobHolder(job))
+
+    def test_inline_monitoring(self):
+        from unittest import mock
+
+        from ..canvas import chain_inline
+
+        workflow = chain_inline(
+            self.holder,
+            tasks.monitored_identity_task.s(),
+            tasks.monitored_identity_task.s(),
+        )
+        self.assertEqual(len(workflow.tasks), 2)
+        result = workflow.apply_async(debug=True)
+        self.assertEqual(result.state, "SUCCESS")
+        job = result.result.get_job()
+        self.assertIs(job.state, AJob.EState.COMPLETED)
+        self.assertIs(job.status, AJob.EStatus.SUCCESS)
+        self.assertIsNotNone(job.started)
+        self.assertIsNotNone(job.duration)
+        # Single task, stopped before its result is stored
+        job = models.TestJob()
+        job.save()
+        states = []
+        with mock.patch.object(
+            tasks.monitored_identity_task.backend,
+            "mark_as_done",
+            side_effect=lambda *args, **kwargs: states.append(
+                models.TestJob.objects.get(pk=job.pk).state
+            ),
+        ):
+            chain_inline(JobHolder(job), tasks.monitored_identity_task.s()).apply_async(
+                debug=True
+            )
+        self.assertEqual(states, [AJob.EState.COMPLETED])
+        job.refresh_from_db()
+        self.assertIs(job.state, AJob.EState.COMPLETED)
+        self.assertIs(job.status, AJob.EStatus.SUCCESS)
+        # Without the canvas, the job is left untouched
+        job = models.TestJob()
+        job.save()
+        tasks.monitored_identity_task.apply(args=(JobHolder(job),))
+        job.refresh_from_db()
+        self.assertIs(job.state, AJob.EState.CREATED)
+        # Failure
+        job = models.TestJob()
+        job.save()
+        result = chain_inline(
+            JobHolder(job), tasks.monitored_raising_task.s()
+        ).apply_async(debug=True)
+        self.assertEqual(result.state, "FAILURE")
+        job.refresh_from_db()
+        self.assertIs(job.state, AJob.EState.COMPLETED)
+        self.assertIs(job.status, AJob.EStatus.FAILURE)
+        self.assertTrue(job.has_failed())
+
     def test_failed_task(self):
         workflow = chain(self.holder, tasks.failing_task.s())
         result = workflow.apply_async(debug=True)
@@ -270,6 +952,493 @@ class TasksTestCase(TestCase):
         self.assertTrue("msg" in error)
         self.assertEqual(error["exception"], RuntimeError.__name__)
 
+    def test_reap_old_jobs(self):
+        from datetime import timedelta
+
+        from django.core.cache import caches
+        from django.utils import timezone
+
+        from ..tasks import reap_old_jobs
+
+        models.TestJobTwo().save()
+        models.TestJob.objects.update(closure=timezone.now() - timedelta(seconds=1))
+        models.TestJobTwo.objects.update(closure=timezone.now() - timedelta(seconds=1))
+        lock = "celery_growthmonitor.tasks:reaper"
+        caches[settings.CACHE].add(lock, "elsewhere")
+        self.assertIsNone(reap_old_jobs.delay().get())
+        self.assertTrue(models.TestJob.objects.exists())
+        caches[settings.CACHE].delete(lock)
+        reports = reap_old_jobs.delay().get()
+        self.assertEqual(reports["tests.TestJob"][0], 1)
+        self.assertEqual(reports["tests.TestJobTwo"][0], 1)
+        self.assertFalse(models.TestJob.objects.exists())
+        self.assertFalse(models.TestJobTwo.objects.exists())
+        self.assertIsNone(caches[settings.CACHE].get(lock))
+
+    def test_purge_in_chain(self):
+        from datetime import timedelta
+        from unittest import mock
+
+        from .. import canvas
+        from ..tasks import remove_old_jobs
+
+        with mock.patch.object(settings, "TTL", timedelta(seconds=60)):
+            self.assertEqual(canvas.post()[-1].task, remove_old_jobs.name)
+            with mock.patch.object(settings, "PURGE_IN_CHAIN", False):
+                self.assertNotIn(
+                    remove_old_jobs.name, [sig.task for sig in canvas.post()]
+                )
+
+
+class MetricsTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import caches
+
+        self.cache = caches[settings.CACHE]
+        self.cache.clear()
+        self.app_root = os.path.join(
+            settings.django_settings.MEDIA_ROOT, settings.APP_MEDIA_ROOT
+        )
+
+    def tearDown(self):
+        import shutil
+
+        self.cache.clear()
+        shutil.rmtree(self.app_root)
+
+    def test_metrics(self):
+        from datetime import timedelta
+
+        from django.test import RequestFactory
+        from django.utils import timezone
+
+        from ..metrics import collect_metrics
+        from ..models import jobs_purged
+        from ..views import metrics_view
+
+        # Purges are counted by a receiver connected by the app config
+        self.assertTrue(jobs_purged.has_listeners(models.TestJob))
+
+        for _ in range(3):
+            models.TestJob().save()
+        job = models.TestJob.objects.first()
+        job.start()
+        job.stop()
+        models.TestJob.objects.filter(pk=job.pk).update(
+            duration=timedelta(seconds=30),
+            closure=timezone.now() - timedelta(seconds=1),
+        )
+        models.TestJob.purge_expired()
+        models.TestJobTwo().save()
+        metrics = collect_metrics()
+        model = 'model="tests.testjob"'
+        for line in (
+            "# TYPE celery_growthmonitor_jobs gauge",
+            'celery_growthmonitor_jobs{{{},state="CREATED",status="ACTIVE"}} 2',
+            'celery_growthmonitor_jobs{{model="tests.testjobtwo",state="CREATED",'
+            'status="ACTIVE"}} 1',
+            "celery_growthmonitor_purged_jobs_total{{{}}} 1",
+            "celery_growthmonitor_job_duration_seconds_count{{{}}} 0",
+        ):
+            self.assertIn(line.format(model), metrics.splitlines())
+        # Cached
+        models.TestJob().save()
+        with self.assertNumQueries(0):
+            response = metrics_view(RequestFactory().get("/metrics"))
+        self.assertEqual(response.content.decode(), metrics)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.cache.clear()
+        job = models.TestJob.objects.first()
+        job.start()
+        models.TestJob.objects.filter(pk=job.pk).update(duration=timedelta(seconds=30))
+        metrics = collect_metrics().splitlines()
+        for line in (
+            'celery_growthmonitor_job_duration_seconds_bucket{{{},le="10"}} 0',
+            'celery_growthmonitor_job_duration_seconds_bucket{{{},le="60"}} 1',
+            'celery_growthmonitor_job_duration_seconds_bucket{{{},le="+Inf"}} 1',
+            "celery_growthmonitor_job_duration_seconds_sum{{{}}} 30.0",
+            "celery_growthmonitor_purged_jobs_total{{{}}} 0",
+        ):
+            self.assertIn(line.format(model), metrics)
+
+
+class StatusTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import caches
+
+        self.cache = caches[settings.CACHE]
+        self.cache.clear()
+        self.job = models.TestJob()
+        self.job.save()
+        self.app_root = os.path.join(
+            settings.django_settings.MEDIA_ROOT, settings.APP_MEDIA_ROOT
+        )
+
+    def tearDown(self):
+        import shutil
+
+        self.cache.clear()
+        shutil.rmtree(self.app_root)
+
+    def get(self, etag=None, wait=None):
+        from django.test import RequestFactory
+
+        from ..views import JobStatusView
+
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        request = RequestFactory().get(
+            "/status", {"wait": wait} if wait else {}, **headers
+        )
+        return JobStatusView.as_view(model=models.TestJob)(request, pk=self.job.pk)
+
+    def test_version(self):
+        self.assertEqual(self.job.version, 0)
+        self.job.save()
+        self.assertEqual(self.job.version, 1)
+        self.job.start()
+        self.assertEqual(self.job.version, 2)
+        self.job.report_progress(1, 2)
+        from ..models.buffer import write_behind
+
+        write_behind.flush()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.version, 3)
+        self.job.stop()
+        self.assertEqual(self.job.version, 4)
+
+    def test_status_view(self):
+        import json
+        from unittest import mock
+
+        from .. import status
+
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"0"')
+        self.assertEqual(json.loads(response.content)["state"], "CREATED")
+        # Served from the cache
+        with self.assertNumQueries(0), mock.patch.object(status.time, "sleep") as sleep:
+            self.assertEqual(self.get(etag='"0"').status_code, 304)
+            with mock.patch.object(
+                status.time, "monotonic", side_effect=[0, 0.1, 29.9, 30]
+            ):
+                self.assertEqual(self.get(etag='W/"0"', wait=60).status_code, 304)
+        self.assertEqual(sleep.call_count, 2)
+        # Waiting is capped by the timeout
+        self.assertAlmostEqual(sleep.call_args[0][0], settings.LONGPOLL_TIMEOUT - 29.9)
+        with on_commit_run():
+            self.job.start()
+        response = self.get(etag='"0"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"1"')
+        self.assertEqual(json.loads(response.content)["state"], "RUNNING")
+
+        # Long polling, until the job is updated
+        def update(seconds):
+            with on_commit_run():
+                self.job.stop()
+
+        with mock.patch.object(status.time, "sleep", side_effect=update) as sleep:
+            response = self.get(etag='"1"', wait=10)
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"2"')
+        self.assertEqual(json.loads(response.content)["status"], "SUCCESS")
+        # Until the timeout
+        with mock.patch.object(status.time, "sleep") as sleep, mock.patch.object(
+            status.time, "monotonic", side_effect=[0, 0.1, 20]
+        ):
+            self.assertEqual(self.get(etag='"2"', wait=10).status_code, 304)
+        self.assertEqual(sleep.call_count, 1)
+
+    def test_concurrent_update(self):
+        from unittest import mock
+
+        from django.db.models.query import QuerySet
+
+        from .. import status
+        from ..models.buffer import write_behind
+
+        first = QuerySet.first
+        updates = []
+
+        def first_then_update(queryset):
+            row = first(queryset)
+            if not updates:
+                # Committed after the status has been read, before it is cached
+                with on_commit_run():
+                    updates.append(models.TestJob.objects.get(pk=self.job.pk).start())
+            return row
+
+        with mock.patch.object(
+            QuerySet, "first", autospec=True, side_effect=first_then_update
+        ):
+            state = status.get_status(models.TestJob, self.job.pk)["state"]
+        self.assertIs(state, AJob.EState.CREATED)
+        state = status.get_status(models.TestJob, self.job.pk)["state"]
+        self.assertIs(state, AJob.EState.RUNNING)
+        # Buffered updates written once the job has been completed by another worker
+        self.job.refresh_from_db()
+        with on_commit_run():
+            models.TestJob.objects.get(pk=self.job.pk).stop()
+        version = status.get_status(models.TestJob, self.job.pk)["version"]
+        with mock.patch.multiple(write_behind, interval=60, size=100), mock.patch(
+            "threading.Timer"
+        ):
+            self.job.report_progress(1, 2, "Half")
+            self.job.identifier = "late"
+            self.job.buffered_save(["identifier"])
+            with on_commit_run():
+                self.job.stop()
+        current = status.get_status(models.TestJob, self.job.pk)
+        self.assertEqual(current["version"], version + 1)
+        # Except the progress, overridden by the completion
+        self.assertEqual(current["progress_message"], "")
+        self.assertEqual(current["completion"], 1)
+        self.assertEqual(models.TestJob.objects.get(pk=self.job.pk).identifier, "late")
+
+    @skipIf(django.VERSION < (3, 1), "Asynchronous views require Django >= 3.1")
+    async def test_async_status_view(self):
+        import json
+        from unittest import mock
+
+        from asgiref.sync import sync_to_async
+        from django.test import RequestFactory
+
+        from .. import status
+        from ..views import AsyncJobStatusView
+
+        view = AsyncJobStatusView.as_view(model=models.TestJob)
+        response = await view(RequestFactory().get("/status"), pk=self.job.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"0"')
+
+        # Long polling without blocking the thread, until the job is updated
+        @sync_to_async
+        def update(seconds):
+            with on_commit_run():
+                self.job.start()
+
+        request = RequestFactory().get(
+            "/status", {"wait": 10}, HTTP_IF_NONE_MATCH='"0"'
+        )
+        with mock.patch.object(
+            status.asyncio, "sleep", side_effect=update
+        ) as sleep, mock.patch.object(status.time, "sleep") as blocking_sleep:
+            response = await view(request, pk=self.job.pk)
+        self.assertEqual(sleep.call_count, 1)
+        self.assertFalse(blocking_sleep.called)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["state"], "RUNNING")
+        # Until the timeout
+        request = RequestFactory().get(
+            "/status", {"wait": 0.05}, HTTP_IF_NONE_MATCH='"1"'
+        )
+        with mock.patch.object(settings, "LONGPOLL_INTERVAL", 0.01):
+            response = await view(request, pk=self.job.pk)
+        self.assertEqual(response.status_code, 304)
+        # Not allowed methods are answered as well
+        response = await view(RequestFactory().post("/status"), pk=self.job.pk)
+        self.assertEqual(response.status_code, 405)
+
+
+class Superuser:
+    is_active = is_staff = is_superuser = True
+
+    def has_perm(self, perm, obj=None):
+        return True
+
+
+class AdminTestCase(TestCase):
+    def setUp(self):
+        for _ in range(5):
+            models.TestJob().save()
+        self.app_root = os.path.join(
+            settings.django_settings.MEDIA_ROOT, settings.APP_MEDIA_ROOT
+        )
+
+    def tearDown(self):
+        import shutil
+
+        shutil.rmtree(self.app_root)
+
+    def test_estimated_count_paginator(self):
+        from unittest import mock
+
+        from ..admin import EstimatedCountPaginator
+
+        queryset = models.TestJob.objects.order_by("pk")
+        self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 5)
+        with mock.patch.object(EstimatedCountPaginator, "limit", 3):
+            paginator = EstimatedCountPaginator(queryset, 2)
+            self.assertEqual(paginator.count, 3)
+            self.assertEqual(paginator.num_pages, 2)
+            self.assertEqual(
+                EstimatedCountPaginator(queryset.filter(pk__lte=2), 2).count, 2
+            )
+            self.assertEqual(EstimatedCountPaginator(list(range(5)), 2).count, 5)
+
+    def test_change_list(self):
+        from django.contrib.admin import AdminSite
+        from django.test import RequestFactory
+
+        from ..admin import AJobAdmin
+
+        request = RequestFactory().get("/")
+        model_admin = AJobAdmin(models.TestJob, AdminSite())
+        self.assertNotIn("__str__", model_admin.get_list_display(request))
+        paginator = model_admin.get_paginator(
+            request, model_admin.get_queryset(request).order_by("pk"), 10
+        )
+        # Capped count, then the page
+        with self.assertNumQueries(2):
+            jobs = list(paginator.page(1).object_list)
+            for job in jobs:
+                for field in model_admin.get_list_display(request):
+                    getattr(job, field)
+        self.assertEqual(len(jobs), 5)
+        self.assertIn("error", jobs[0].get_deferred_fields())
+        # Anything else than fields
+        model_admin.list_display = ("__str__", "state")
+        self.assertIsNone(model_admin.get_list_only_fields(request))
+
+    def test_has_job_admin_mixin(self):
+        from django.test import RequestFactory
+
+        from .admin import site
+
+        jobs = list(models.TestJob.objects.all())
+        models.TestFile.objects.bulk_create(
+            models.TestFile(job=jobs[i % len(jobs)], data="data.txt")
+            for i in range(100)
+        )
+        request = RequestFactory().get("/")
+        request.user = Superuser()
+        model_admin = site._registry[models.TestFile]
+        self.assertIs(model_admin.get_job_model(), models.TestJob)
+        self.assertIn("job", model_admin.get_autocomplete_fields(request))
+        changelist = model_admin.get_changelist_instance(request)
+        with self.assertNumQueries(1):
+            for data_file in changelist.result_list:
+                self.assertEqual(model_admin.render_job(data_file), str(data_file.job))
+                self.assertIn(
+                    "/admin/tests/testjob/{}/change/".format(data_file.job_id),
+                    model_admin.job_link(data_file),
+                )
+        self.assertEqual(len(changelist.result_list), 100)
+        # Searched by slug
+        request = RequestFactory().get("/", {"q": jobs[0].slug})
+        request.user = Superuser()
+        changelist = model_admin.get_changelist_instance(request)
+        self.assertEqual(changelist.result_count, 20)
+        # Case-sensitive lookups, covered by the indexes of the jobs
+        (search,) = changelist.queryset.query.where.children
+        self.assertEqual(
+            [lookup.lookup_name for lookup in search.children], ["exact", "startswith"]
+        )
+        # Searched by identifier prefix
+        models.TestJob.objects.filter(pk=jobs[1].pk).update(identifier="Sample")
+        request = RequestFactory().get("/", {"q": "Samp"})
+        request.user = Superuser()
+        changelist = model_admin.get_changelist_instance(request)
+        self.assertEqual(changelist.result_count, 20)
+        # Without loading the job
+        data_file = models.TestFile.objects.first()
+        with self.assertNumQueries(0):
+            self.assertIn(
+                ">TestJob {}<".format(data_file.job_id),
+                model_admin.job_link(data_file),
+            )
+
+    def test_background_actions(self):
+        import json
+        from unittest import mock
+
+        from django.contrib.messages.storage.cookie import CookieStorage
+        from django.http import Http404
+        from django.test import RequestFactory
+
+        from ..tasks import get_operation
+        from .admin import site
+
+        request = RequestFactory().post("/")
+        request.user = Superuser()
+        request._messages = CookieStorage(request)
+        model_admin = site._registry[models.TestJob]
+        actions = model_admin.get_actions(request)
+        self.assertNotIn("delete_selected", actions)
+        self.assertIn("delete_in_background", actions)
+        self.assertIn("rerun_in_background", actions)
+        self.assertFalse(models.TestJobTwo.can_rerun())
+        queryset = models.TestJob.objects.all()
+        for job in queryset:
+            job.start()
+            job.failed(tasks.failing_task, RuntimeError("Failure"))
+        with mock.patch.object(settings, "ADMIN_ACTION_CHUNK_SIZE", 2):
+            operation = model_admin.rerun_in_background(request, queryset)
+        self.assertIn(operation, list(request._messages)[0].message)
+        progress = json.loads(model_admin.operation_view(request, operation).content)
+        self.assertEqual(progress, {"total": 5, "done": 5, "failed": 0})
+        for job in queryset.all():
+            self.assertIs(job.state, AJob.EState.COMPLETED)
+            self.assertIs(job.status, AJob.EStatus.SUCCESS)
+        # Only completed jobs are run again
+        pending = models.TestJob()
+        pending.save()
+        operation = model_admin.rerun_in_background(
+            request, queryset.filter(pk__in=[1, pending.pk])
+        )
+        self.assertEqual(get_operation(operation), {"total": 2, "done": 1, "failed": 1})
+        pending.refresh_from_db()
+        self.assertIs(pending.state, AJob.EState.CREATED)
+        stale = models.TestJob.objects.get(pk=1)
+        models.TestJob.objects.filter(pk=1).update(state=AJob.EState.RUNNING)
+        self.assertIsNone(stale.rerun())
+        self.assertIs(models.TestJob.objects.get(pk=1).state, AJob.EState.RUNNING)
+        # Deletion
+        with mock.patch.object(settings, "ADMIN_ACTION_CHUNK_SIZE", 2):
+            operation = model_admin.delete_in_background(
+                request, queryset.filter(pk__gt=1)
+            )
+        self.assertEqual(get_operation(operation), {"total": 5, "done": 5, "failed": 0})
+        self.assertEqual(list(queryset.values_list("pk", flat=True)), [1])
+        self.assertFalse(
+            os.path.exists(os.path.join(self.app_root, "testjob", "2", "results"))
+        )
+        with self.assertRaises(Http404):
+            model_admin.operation_view(request, "unknown")
+
+
+class BenchmarksTestCase(TestCase):
+    def test_run(self):
+        from . import benchmarks
+
+        results = benchmarks.run(jobs=2, lengths=(1,), admin_rows=20)
+        self.assertEqual(
+            set(results),
+            {
+                "admin",
+                "creation[files=False]",
+                "creation[files=True]",
+                "serialization",
+                "chain[length=1,files=False]",
+                "chain[length=1,files=True]",
+            },
+        )
+        chain_results = results["chain[length=1,files=False]"]
+        self.assertEqual(
+            set(chain_results["hops"]),
+            {
+                "celery_growthmonitor.tasks.start",
+                "celery_growthmonitor.tests.tasks.identity_task",
+                "celery_growthmonitor.tasks.stop",
+                "celery_growthmonitor.tasks.remove_old_jobs",
+            },
+        )
+        self.assertGreater(chain_results["queries_per_job"], 0)
+        self.assertGreaterEqual(results["admin"]["admin"]["count"], 20)
+        self.assertEqual(results["admin"]["admin"]["queries"], 2)
+
 
 class SerializationTestCase(TestCase):
     def setUp(self):
@@ -301,6 +1470,84 @@ class SerializationTestCase(TestCase):
         workflow = chain(mt, tasks.identity_task.s())
         self.assertRaises(job.DoesNotExist, workflow.apply_async, debug=True)
 
+    def test_job_class_resolution(self):
+        from ..models.jobholder import get_job_class
+
+        get_job_class.cache_clear()
+        self.holder.pre_serialization().post_serialization()
+        self.holder.pre_serialization().post_serialization()
+        self.assertEqual(get_job_class.cache_info().misses, 1)
+        self.assertEqual(get_job_class.cache_info().hits, 1)
+
+    def test_job_cache(self):
+        from unittest import mock
+
+        from ..models.jobcache import job_cache
+
+        self.holder.pre_serialization()
+        with self.assertNumQueries(2):
+            self.holder.post_serialization().pre_serialization()
+            self.holder.post_serialization().pre_serialization()
+        with mock.patch.object(job_cache, "ttl", 60):
+            self.addCleanup(job_cache.clear)
+            with self.assertNumQueries(1):
+                self.holder.post_serialization().pre_serialization()
+                self.holder.post_serialization()
+            job = self.holder.job
+            self.holder.pre_serialization().post_serialization()
+            self.assertIsNot(job, self.holder.job)
+            # Changing the state invalidates the cached job
+            job.start()
+            with self.assertNumQueries(1):
+                self.holder.pre_serialization().post_serialization()
+            self.assertIs(self.holder.job.state, AJob.EState.RUNNING)
+            # Expired entries are not served
+            with mock.patch("time.monotonic", return_value=float("inf")):
+                with self.assertNumQueries(1):
+                    self.holder.pre_serialization().post_serialization()
+
+    def test_state_cache(self):
+        from unittest import mock
+
+        from django.core.cache import caches
+
+        from .. import status
+        from ..models.jobcache import job_cache
+
+        cache = caches[settings.CACHE]
+        cache.clear()
+        self.addCleanup(cache.clear)
+        with self.assertNumQueries(1):
+            state = models.TestJob.get_cached_state(self.job.pk)
+        self.assertIs(state["state"], AJob.EState.CREATED)
+        with self.assertNumQueries(0):
+            self.assertEqual(models.TestJob.get_cached_state(self.job.pk), state)
+        self.assertIsNone(models.TestJob.get_cached_state(self.job.pk + 1))
+        # Invalidated
+        stale = models.TestJob.objects.get(pk=self.job.pk)
+        with on_commit_run():
+            self.job.start()
+        with self.assertNumQueries(1):
+            state = models.TestJob.get_cached_state(self.job.pk)
+        self.assertIs(state["state"], AJob.EState.RUNNING)
+        self.assertEqual(state["started"], self.job.started)
+        self.assertEqual(state, status.get_status(models.TestJob, self.job.pk))
+        # Jobs cached by other processes are refreshed
+        with mock.patch.object(job_cache, "ttl", 60):
+            self.addCleanup(job_cache.clear)
+            job_cache.put(stale)
+            with self.assertNumQueries(0):
+                self.holder.pre_serialization().post_serialization()
+            self.assertIs(self.holder.job.state, AJob.EState.RUNNING)
+        with on_commit_run():
+            self.job.failed(tasks.failing_task, RuntimeError("Failure"))
+        state = models.TestJob.get_cached_state(self.job.pk)
+        self.assertIs(state["status"], AJob.EStatus.FAILURE)
+        self.assertEqual(state["error"], self.job.error)
+        with on_commit_run():
+            self.job.delete()
+        self.assertIsNone(models.TestJob.get_cached_state(self.job.pk))
+
     # def test_json(self):
     #     import json
     #     json.dumps(self.mt.__dict__)
@@ -317,3 +1564,41 @@ class SerializationTestCase(TestCase):
         self.holder.post_serialization()
         self.assertIsNotNone(self.holder._job)
         pickle.loads(pickle.dumps(self.holder.pre_serialization()))
+
+    def test_app_config(self):
+        from django.apps import apps
+
+        from ..apps import CeleryGrowthMonitorConfig
+
+        # Registers the serializers and connects the receivers, on any Django version
+        self.assertIsInstance(
+            apps.get_app_config("celery_growthmonitor"), CeleryGrowthMonitorConfig
+        )
+
+    def test_compact_serializers(self):
+        import pickle
+
+        from kombu.serialization import dumps, loads
+
+        from .. import serialization
+        from ..tasks import ReturnTuple, extract_job_holder
+
+        payload = ((ReturnTuple(self.holder.pre_serialization(), (True, 2)),), {}, {})
+        serializers = [serialization.JSON]
+        if serialization.msgpack:
+            serializers.append(serialization.MSGPACK)
+        for serializer in serializers:
+            content_type, content_encoding, data = dumps(payload, serializer=serializer)
+            self.assertLess(len(data), len(pickle.dumps(payload)))
+            args, kwargs, embed = loads(data, content_type, content_encoding)
+            self.assertIsInstance(args[0], ReturnTuple)
+            self.assertEqual(args[0].results, (True, 2))
+            job_holder = args[0].job_holder
+            self.assertIsInstance(job_holder, JobHolder)
+            self.assertIsNone(job_holder.job)
+            self.assertEqual(job_holder.get_job(), self.job)
+        # Tuples are received as lists
+        data = serialization.dumps_json((self.holder.pre_serialization(), True))
+        job_holder, results = extract_job_holder(serialization.loads_json(data))
+        self.assertEqual(job_holder.job, self.job)
+        self.assertEqual(results, (True,))
@@ -0,0 +1,120 @@
+import asyncio
+from functools import update_wrapper
+
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse
+from django.views import View
+
+from . import settings
+from .metrics import CONTENT_TYPE, collect_metrics
+from .status import await_change, get_status, wait_for_change
+
+
+def metrics_view(request):
+    """
+    Expose the metrics about the jobs to Prometheus. Access control is left to the URL configuration.
+    """
+    return HttpResponse(collect_metrics(), content_type=CONTENT_TYPE)
+
+
+class JobStatusView(View):
+    """
+    Expose the status of a job as JSON, with its version as ETag. Access control is left to the URL configuration.
+
+    Given the ETag in the ``If-None-Match`` header, the response is ``304 Not Modified`` as long as the job has not
+    changed. With the ``wait`` query parameter, the request is held until the job changes, at most ``wait`` seconds,
+    capped by ``settings.LONGPOLL_TIMEOUT``. The database is only queried once the job has changed, see
+    `status.wait_for_change`.
+
+    Each waiting request holds a thread of the server. With many polling clients, prefer `AsyncJobStatusView` served
+    under ASGI, or keep ``settings.LONGPOLL_TIMEOUT`` small.
+
+    Examples
+    --------
+    >>> path("jobs/<int:pk>/status", JobStatusView.as_view(model=MyJob))
+    """
+
+    model = None
+    """Concrete subclass of AJob"""
+
+    def get(self, request, pk):
+        version = self.get_client_version(request)
+        if version is None:
+            status = get_status(self.model, pk)
+        else:
+            status = wait_for_change(self.model, pk, version, self.get_wait(request))
+        return self.render(pk, status, version)
+
+    @staticmethod
+    def get_wait(request):
+        try:
+            wait = float(request.GET.get("wait", 0))
+        except ValueError:
+            wait = 0
+        return min(max(wait, 0), settings.LONGPOLL_TIMEOUT)
+
+    def render(self, pk, status, version):
+        if status is None:
+            raise Http404("No {} found".format(self.model._meta.verbose_name))
+        etag = '"{}"'.format(status["version"])
+        if status["version"] == version:
+            response = HttpResponseNotModified()
+        else:
+            response = JsonResponse(self.serialize(pk, status))
+        response["ETag"] = etag
+        response["Cache-Control"] = "no-cache"
+        return response
+
+    @staticmethod
+    def get_client_version(request):
+        etag = request.headers.get("If-None-Match", "")
+        if etag.startswith("W/"):
+            etag = etag[2:]
+        try:
+            return int(etag.strip('"'))
+        except ValueError:
+            return None
+
+    def serialize(self, pk, status):
+        duration = status["duration"]
+        started = status["started"]
+        return {
+            "id": pk,
+            "version": status["version"],
+            "state": status["state"].name,
+            "status": status["status"].name,
+            "completion": status["completion"],
+            "progress_message": status["progress_message"],
+            "started": started.isoformat() if started else None,
+            "duration": duration.total_seconds() if duration else None,
+        }
+
+
+class AsyncJobStatusView(JobStatusView):
+    """
+    Asynchronous counterpart of `JobStatusView`, waiting for changes without holding a thread, see
+    `status.await_change`. Meant to be served under ASGI, requires Django >= 3.1.
+
+    Examples
+    --------
+    >>> path("jobs/<int:pk>/status", AsyncJobStatusView.as_view(model=MyJob))
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+
+        async def async_view(request, *args, **kwargs):
+            # Class-based views are only detected as asynchronous since Django 4.1
+            response = view(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+            return response
+
+        update_wrapper(async_view, view)
+        return async_view
+
+    async def get(self, request, pk):
+        version = self.get_client_version(request)
+        wait = 0 if version is None else self.get_wait(request)
+        status = await await_change(self.model, pk, version, wait)
+        return self.render(pk, status, version)